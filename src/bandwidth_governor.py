@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+带宽控制模块
+
+这个模块负责限制所有下载任务的总带宽，并根据实测吞吐量自动调整同时下载的视频数量。
+带宽上限可以按时间段配置（例如工作时间限速、夜间不限速）。
+"""
+
+import time
+import logging
+import datetime
+import threading
+
+logger = logging.getLogger('bandwidth_governor')
+
+
+class BandwidthGovernor:
+    """下载带宽控制器"""
+    
+    def __init__(self, config=None, max_concurrency=4):
+        """初始化
+        
+        Args:
+            config: 带宽配置字典（config.json中的 bandwidth 部分）
+            max_concurrency: 默认最大并发下载数
+        """
+        config = config or {}
+        self.default_limit = config.get('default_limit', 0)
+        self.windows = config.get('windows', [])
+        self.min_concurrency = max(1, config.get('min_concurrency', 1))
+        self.max_concurrency = max(self.min_concurrency, config.get('max_concurrency', max_concurrency))
+        self.adjust_interval = config.get('adjust_interval', 30)
+        self.plateau_ratio = config.get('plateau_ratio', 0.05)
+        
+        self.concurrency = self.min_concurrency
+        self.active = 0
+        self._condition = threading.Condition()
+        
+        # 各下载任务已下载字节数及最近一次速度
+        self._jobs = {}
+        
+        # 令牌桶，容量为1秒的限速流量
+        self._tokens = 0.0
+        self._last_refill = time.monotonic()
+        self._last_limit = None
+        
+        # 吞吐量统计窗口，同时累计窗口内下载名额的占用时间，用于判断名额是否用满
+        self._reset_window(time.monotonic())
+        self._last_throughput = None
+        self._last_decision = None
+    
+    def _parse_time(self, value):
+        """解析 HH:MM 格式的时间"""
+        return datetime.datetime.strptime(value, '%H:%M').time()
+    
+    def current_limit(self, now=None):
+        """获取当前时间段的带宽上限
+        
+        Args:
+            now: 当前时间，默认为现在
+        
+        Returns:
+            每秒字节数，0表示不限速
+        """
+        current = (now or datetime.datetime.now()).time()
+        for window in self.windows:
+            start = self._parse_time(window['start'])
+            end = self._parse_time(window['end'])
+            if start <= end:
+                matched = start <= current < end
+            else:
+                # 跨越午夜的时间段，例如 22:00-06:00
+                matched = current >= start or current < end
+            if matched:
+                return window.get('limit', 0)
+        return self.default_limit
+    
+    def acquire(self):
+        """等待并占用一个下载名额"""
+        with self._condition:
+            while self.active >= self.concurrency:
+                self._condition.wait()
+            now = time.monotonic()
+            if self.active == 0:
+                # 空闲之后重新开始统计，空闲时间不计入吞吐量，也不与空闲前的吞吐量比较
+                self._reset_window(now)
+                self._last_throughput = None
+            else:
+                self._track_active(now)
+            self.active += 1
+    
+    def release(self):
+        """释放下载名额"""
+        with self._condition:
+            self._track_active(time.monotonic())
+            self.active -= 1
+            self._condition.notify_all()
+    
+    def report(self, job_id, bytes_done):
+        """报告下载进度，返回为遵守带宽上限需要暂停的秒数
+        
+        Args:
+            job_id: 下载任务ID
+            bytes_done: 该任务已下载的总字节数
+        
+        Returns:
+            需要暂停的秒数，0表示无需暂停
+        """
+        now = time.monotonic()
+        with self._condition:
+            job = self._jobs.setdefault(job_id, {'bytes_done': 0, 'updated': now, 'bytes_per_second': 0.0})
+            delta = max(bytes_done - job['bytes_done'], 0)
+            if now > job['updated']:
+                job['bytes_per_second'] = delta / (now - job['updated'])
+            job['bytes_done'] = bytes_done
+            job['updated'] = now
+            self._window_bytes += delta
+            
+            if now - self._window_start >= self.adjust_interval:
+                self._adjust(now)
+            
+            return self._throttle_delay(now, delta)
+    
+    def finish(self, job_id):
+        """下载任务结束，移除其统计信息
+        
+        Args:
+            job_id: 下载任务ID
+        """
+        with self._condition:
+            self._jobs.pop(job_id, None)
+    
+    def _throttle_delay(self, now, delta):
+        """按令牌桶计算需要暂停的时间"""
+        limit = self.current_limit()
+        if limit != self._last_limit:
+            logger.info(
+                f"带宽上限切换为: {self._format_rate(limit) if limit else '不限速'}",
+                extra={'stage': 'governor'}
+            )
+            self._last_limit = limit
+            self._tokens = float(limit)
+        
+        if not limit:
+            self._last_refill = now
+            return 0
+        
+        self._tokens = min(float(limit), self._tokens + (now - self._last_refill) * limit)
+        self._last_refill = now
+        self._tokens -= delta
+        if self._tokens >= 0:
+            return 0
+        return -self._tokens / limit
+    
+    def _reset_window(self, now):
+        """开始新的统计窗口"""
+        self._window_start = now
+        self._window_bytes = 0
+        self._active_seconds = 0.0
+        self._active_since = now
+    
+    def _track_active(self, now):
+        """累计统计窗口内下载名额的占用时间，在占用数变化前调用"""
+        self._active_seconds += self.active * (now - self._active_since)
+        self._active_since = now
+    
+    def _adjust(self, now):
+        """根据统计窗口内的总吞吐量调整并发数（加性增加，吞吐量不再增长时回退）
+        
+        只有下载名额在整个窗口内基本用满时才比较吞吐量，队列快下载完时任务数减少导致的吞吐量下降不会触发回退。
+        """
+        self._track_active(now)
+        elapsed = now - self._window_start
+        throughput = self._window_bytes / elapsed
+        saturated = self._active_seconds >= self.concurrency * elapsed * (1 - self.plateau_ratio)
+        per_download = throughput / max(len(self._jobs), 1)
+        limit = self.current_limit()
+        previous = self._last_throughput
+        old_concurrency = self.concurrency
+        
+        if limit and throughput >= limit * (1 - self.plateau_ratio):
+            decision = 'hold'
+            reason = '已达到带宽上限'
+        elif not saturated:
+            decision = 'hold'
+            reason = '下载名额未用满'
+        elif previous is None or throughput > previous * (1 + self.plateau_ratio):
+            if self.concurrency < self.max_concurrency:
+                self.concurrency += 1
+                decision = 'increase'
+                reason = '总吞吐量仍在增长'
+            else:
+                decision = 'hold'
+                reason = '已达到最大并发数'
+        elif previous and throughput < previous * (1 - self.plateau_ratio) and self.concurrency > self.min_concurrency:
+            self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+            decision = 'backoff'
+            reason = '总吞吐量下降'
+        elif self._last_decision == 'increase' and self.concurrency > self.min_concurrency:
+            self.concurrency -= 1
+            decision = 'backoff'
+            reason = '增加并发后总吞吐量没有提升'
+        else:
+            decision = 'hold'
+            reason = '总吞吐量稳定'
+        
+        logger.info(
+            f"带宽控制: {decision}，并发数 {old_concurrency} -> {self.concurrency}，"
+            f"总吞吐量 {self._format_rate(throughput)}，单任务 {self._format_rate(per_download)}，原因: {reason}",
+            extra={'stage': 'governor'}
+        )
+        
+        self._last_decision = decision
+        if saturated:
+            self._last_throughput = throughput
+        self._reset_window(now)
+        self._condition.notify_all()
+    
+    def _format_rate(self, bytes_per_second):
+        """格式化速度"""
+        for unit in ['B/s', 'KB/s', 'MB/s', 'GB/s']:
+            if bytes_per_second < 1024.0 or unit == 'GB/s':
+                break
+            bytes_per_second /= 1024.0
+        return f"{bytes_per_second:.2f} {unit}"
+    
+    def get_state(self):
+        """获取控制器状态
+        
+        Returns:
+            状态信息字典
+        """
+        with self._condition:
+            return {
+                'limit': self.current_limit(),
+                'concurrency': self.concurrency,
+                'active': self.active,
+                'last_throughput': self._last_throughput,
+                'last_decision': self._last_decision,
+                'jobs': {
+                    job_id: round(job['bytes_per_second'], 1)
+                    for job_id, job in self._jobs.items()
+                }
+            }
@@ -8,38 +8,166 @@ B站视频下载模块
 """
 
 import os
+import re
 import sys
 import json
 import time
+import errno
+import shutil
+import signal
 import logging
+import tempfile
 import subprocess
 from pathlib import Path
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('bilibili_downloader.log', encoding='utf-8')
-    ]
-)
+from logging_setup import setup_logging
+from file_manager import FileManager
+
 logger = logging.getLogger('bilibili_downloader')
 
 
 class BilibiliDownloader:
     """B站视频下载器"""
     
-    def __init__(self, download_dir):
+    # 暂存目录下存放各下载任务目录的子目录名
+    STAGING_DIR_NAME = 'bilibili_staging'
+    
+    # you-get分段文件名，如 "标题[00].mp4"
+    PART_PATTERN = re.compile(r'\[\d+\]\.\w+$')
+    
+    def __init__(self, download_dir, governor=None, temp_dir=None, preallocate=True):
         """初始化
         
         Args:
             download_dir: 下载目录
+            governor: 带宽控制器（BandwidthGovernor），为None时不限速
+            temp_dir: 暂存目录，下载过程中的文件放在这里，完成后再移动到下载目录
+            preallocate: 是否在下载前获取视频大小，用于提前检查空间并在跨文件系统复制时预分配
         """
         self.download_dir = Path(download_dir)
+        self.governor = governor
+        self.preallocate = preallocate
+        self.staging_dir = self.get_staging_dir(temp_dir)
         
-        # 确保下载目录存在
+        # 确保下载目录和暂存目录存在
         os.makedirs(self.download_dir, exist_ok=True)
+        os.makedirs(self.staging_dir, exist_ok=True)
+    
+    @classmethod
+    def get_staging_dir(cls, temp_dir=None):
+        """获取暂存目录路径
+        
+        Args:
+            temp_dir: 临时目录，为None时使用系统临时目录
+            
+        Returns:
+            暂存目录路径
+        """
+        return Path(temp_dir or tempfile.gettempdir()) / cls.STAGING_DIR_NAME
+    
+    @staticmethod
+    def _pid_alive(pid):
+        """判断进程是否仍在运行"""
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        except OSError:
+            return False
+        return True
+    
+    @classmethod
+    def reap_staging_dir(cls, staging_dir):
+        """清理已退出进程遗留的暂存目录，不需要创建下载器实例
+        
+        暂存目录名中包含所属进程的PID，仍在运行的进程（包括其他配置的监控进程）的目录会被保留。
+        
+        Args:
+            staging_dir: 暂存目录路径
+            
+        Returns:
+            清理的目录数量
+        """
+        if not os.path.isdir(staging_dir):
+            return 0
+        
+        count = 0
+        try:
+            entries = list(os.scandir(staging_dir))
+        except OSError as e:
+            logger.error(f"读取暂存目录失败: {e}")
+            return 0
+        
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            parts = entry.name.split('.')
+            try:
+                pid = int(parts[1])
+            except (IndexError, ValueError):
+                continue
+            if pid == os.getpid() or cls._pid_alive(pid):
+                continue
+            shutil.rmtree(entry.path, ignore_errors=True)
+            logger.info(f"已清理遗留的暂存目录: {entry.path}")
+            count += 1
+        return count
+    
+    def reap_staging(self):
+        """清理本下载器暂存目录中已退出进程遗留的目录
+        
+        Returns:
+            清理的目录数量
+        """
+        return self.reap_staging_dir(self.staging_dir)
+    
+    def _check_free_space(self, directory, size):
+        """检查目录所在磁盘的剩余空间
+        
+        Args:
+            directory: 目录路径
+            size: 需要的字节数
+            
+        Raises:
+            OSError: 剩余空间不足
+        """
+        free = shutil.disk_usage(directory).free
+        if free < size:
+            raise OSError(errno.ENOSPC, f"磁盘空间不足: 需要 {size} 字节，剩余 {free} 字节", str(directory))
+    
+    def _publish(self, job_dir, up_dir, video_id):
+        """将暂存目录中下载完成的文件发布到UP主目录
+        
+        与冷热分层共用 FileManager.replace_file，目标目录中不会出现不完整的文件。
+        you-get按视频标题命名文件，同一UP主的视频可能重名（如多期"直播回放"），
+        目标文件已存在时在文件名后加上BV号，不覆盖其他视频的文件。
+        
+        Args:
+            job_dir: 下载任务的暂存目录
+            up_dir: UP主目录
+            video_id: 视频ID (BV号)
+            
+        Returns:
+            发布后的文件路径列表
+        
+        Raises:
+            FileExistsError: 加上BV号后的文件名仍已存在
+        """
+        published = []
+        for src in sorted(job_dir.iterdir()):
+            # you-get未完成的文件以 .download 结尾
+            if not src.is_file() or src.name.endswith('.download'):
+                continue
+            dst = up_dir / src.name
+            if dst.exists():
+                dst = up_dir / f"{src.stem}_{video_id}{src.suffix}"
+                if dst.exists():
+                    raise FileExistsError(errno.EEXIST, "目标文件已存在", str(dst))
+            FileManager.replace_file(src, dst)
+            published.append(dst)
+        return published
     
     def check_you_get(self):
         """检查you-get是否已安装"""
@@ -76,12 +204,108 @@ class BilibiliDownloader:
             logger.error(f"安装you-get异常: {e}")
             return False
     
-    def download_video(self, video_id, up_name):
+    def _network_bytes_since(self, directory, since, counted):
+        """统计下载任务自某时刻以来从网络下载的字节数
+        
+        只统计下载中的文件（.download）和分段文件（如 "标题[00].mp4"）。DASH视频的音视频分段下载完成后，
+        you-get会用ffmpeg在同一目录中合并并删除分段，合并输出是本地磁盘写入，不计入网络流量；
+        已删除分段的字节数保留在 counted 中。没有出现过下载中文件和分段文件时（大小未知的视频直接写入
+        最终文件名），才统计普通文件。
+        
+        Args:
+            directory: 目录路径
+            since: 起始时间戳
+            counted: {文件名: 已统计字节数}，同一下载任务的多次调用共用
+            
+        Returns:
+            字节数
+        """
+        plain = 0
+        try:
+            for entry in os.scandir(directory):
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if stat.st_mtime < since:
+                    continue
+                # 下载完成后 .download 文件会重命名为最终文件名，按同一文件统计
+                name = entry.name[:-len('.download')] if entry.name.endswith('.download') else entry.name
+                if name != entry.name or name in counted or self.PART_PATTERN.search(name):
+                    counted[name] = max(counted.get(name, 0), stat.st_size)
+                else:
+                    plain += stat.st_size
+        except OSError:
+            pass
+        return sum(counted.values()) if counted else plain
+    
+    def _suspend(self, process, seconds):
+        """暂停下载进程一段时间以满足带宽上限
+        
+        Args:
+            process: 下载进程
+            seconds: 暂停秒数
+        """
+        # 不支持SIGSTOP的平台（Windows）上只能依靠并发数控制带宽
+        if not hasattr(signal, 'SIGSTOP'):
+            return
+        try:
+            process.send_signal(signal.SIGSTOP)
+            time.sleep(seconds)
+        finally:
+            process.send_signal(signal.SIGCONT)
+    
+    def _run_you_get(self, args, watch_dir, progress_callback=None, poll_interval=1.0, job_id=None):
+        """运行you-get并在下载过程中报告进度
+        
+        Args:
+            args: you-get命令参数
+            watch_dir: 下载输出目录，用于统计已下载的字节数
+            progress_callback: 进度回调函数，参数为已下载字节数
+            poll_interval: 进度统计间隔（秒）
+            job_id: 下载任务ID，用于带宽控制统计
+            
+        Returns:
+            (返回码, 标准输出, 标准错误)
+        """
+        started = time.time()
+        counted = {}
+        process = subprocess.Popen(
+            args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        try:
+            while True:
+                try:
+                    stdout, stderr = process.communicate(timeout=poll_interval)
+                    break
+                except subprocess.TimeoutExpired:
+                    bytes_done = self._network_bytes_since(watch_dir, started, counted)
+                    if progress_callback:
+                        progress_callback(bytes_done)
+                    if self.governor:
+                        delay = self.governor.report(job_id, bytes_done)
+                        if delay > 0:
+                            self._suspend(process, delay)
+            
+            bytes_done = self._network_bytes_since(watch_dir, started, counted)
+            if progress_callback:
+                progress_callback(bytes_done)
+            if self.governor:
+                self.governor.report(job_id, bytes_done)
+        finally:
+            if self.governor:
+                self.governor.finish(job_id)
+        return process.returncode, stdout, stderr
+    
+    def download_video(self, video_id, up_name, progress_callback=None):
         """下载视频
         
         Args:
             video_id: 视频ID (BV号)
             up_name: UP主名称
+            progress_callback: 进度回调函数，参数为已下载字节数
             
         Returns:
             下载结果信息字典
@@ -102,21 +326,36 @@ class BilibiliDownloader:
             # 构建视频URL
             video_url = f"https://www.bilibili.com/video/{video_id}"
             
-            logger.info(f"开始下载视频: {video_url}")
-            
-            # 使用you-get下载视频
-            result = subprocess.run(
-                ['you-get', '-o', str(up_dir), video_url],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
+            # 每个下载任务使用独立的暂存目录，目录名包含PID以便启动时识别遗留目录
+            job_dir = Path(tempfile.mkdtemp(prefix=f"{video_id}.{os.getpid()}.", dir=self.staging_dir))
+            try:
+                # 已知视频大小时提前检查暂存目录和下载目录的剩余空间
+                if self.preallocate:
+                    size = self.get_video_info(video_id).get('size')
+                    if size:
+                        self._check_free_space(job_dir, size)
+                        self._check_free_space(up_dir, size)
+                
+                logger.info(f"开始下载视频: {video_url}")
+                
+                # 使用you-get下载视频到暂存目录
+                returncode, _, stderr = self._run_you_get(
+                    ['you-get', '-o', str(job_dir), video_url],
+                    job_dir,
+                    progress_callback,
+                    job_id=video_id
+                )
+                
+                published = self._publish(job_dir, up_dir, video_id) if returncode == 0 else []
+            finally:
+                shutil.rmtree(job_dir, ignore_errors=True)
             
-            if result.returncode == 0:
+            if returncode == 0:
                 logger.info(f"视频下载成功: {video_id}")
                 
-                # 查找下载的文件
-                downloaded_files = list(up_dir.glob(f"*{video_id}*"))
+                # 优先选择文件名包含BV号的文件，否则选择最大的文件
+                downloaded_files = [path for path in published if video_id in path.name] or \
+                    sorted(published, key=lambda path: path.stat().st_size, reverse=True)
                 if downloaded_files:
                     file_path = downloaded_files[0]
                     return {
@@ -131,10 +370,10 @@ class BilibiliDownloader:
                         'file_path': None
                     }
             else:
-                logger.error(f"视频下载失败: {result.stderr}")
+                logger.error(f"视频下载失败: {stderr}")
                 return {
                     'success': False,
-                    'message': f'下载失败: {result.stderr}'
+                    'message': f'下载失败: {stderr}'
                 }
                 
         except Exception as e:
@@ -175,9 +414,13 @@ class BilibiliDownloader:
                         title = line.split('Title:')[1].strip()
                         break
                 
+                # 各清晰度的大小，形如 "Size: 123.4 MiB (129394394 bytes)"，取最大值
+                sizes = [int(size) for size in re.findall(r'\((\d+) bytes\)', info_text)]
+                
                 return {
                     'success': True,
                     'title': title,
+                    'size': max(sizes) if sizes else None,
                     'info': info_text
                 }
             else:
@@ -203,6 +446,8 @@ def main():
     video_id = sys.argv[1]
     up_name = sys.argv[2] if len(sys.argv) > 2 else "测试UP主"
     
+    setup_logging({'logging': {'file': 'bilibili_downloader.log'}})
+    
     downloader = BilibiliDownloader("../downloads")
     
     # 获取视频信息
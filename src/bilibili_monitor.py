@@ -12,23 +12,51 @@ import sys
 import json
 import time
 import datetime
-import requests
+import queue
 import logging
+import threading
+from collections import deque
+from functools import cached_property
 from pathlib import Path
-import schedule
-import shutil
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('bilibili_monitor.log', encoding='utf-8')
-    ]
-)
+
+from logging_setup import setup_logging
+
+# requests、schedule 以及下载、分层、缓存等组件只在需要时导入，
+# 使 --clean 等只处理本地数据的命令启动更快
+
 logger = logging.getLogger('bilibili_monitor')
 
+# 请求B站接口使用的请求头
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# 动态接口，一次返回所关注UP主的最新视频投稿（需要登录Cookie）
+FEED_URL = "https://api.vc.bilibili.com/dynamic_svr/v1/dynamic_svr/dynamic_new?type_list=8"
+
+
+class RateLimiter:
+    """接口请求限速器（线程安全）"""
+    
+    def __init__(self, rate):
+        """初始化
+        
+        Args:
+            rate: 每秒最多请求次数，0表示不限速
+        """
+        self.interval = 1.0 / rate if rate else 0
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+    
+    def wait(self):
+        """等待直到允许发出下一次请求"""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
 
 class BilibiliMonitor:
     """B站视频监控类"""
@@ -45,12 +73,97 @@ class BilibiliMonitor:
         self.download_dir = Path(config.get('bilibili', {}).get('download_dir', 'downloads'))
         self.video_info_file = self.download_dir / 'video_info.json'
         
-        # 确保下载目录存在
-        os.makedirs(self.download_dir, exist_ok=True)
+        # 冷热分层：超过 after_days 天的视频移动到冷存储目录，未配置 cold_dir 时不分层
+        tiering = config.get('bilibili', {}).get('tiering', {})
+        self.cold_dir = Path(tiering['cold_dir']) if tiering.get('cold_dir') else None
+        self.tier_after_days = tiering.get('after_days', 2)
+        self.tier_batch_size = tiering.get('batch_size', 20)
+        self.tier_io_workers = tiering.get('io_workers', 2)
         
         # 加载已下载视频信息
         self.downloaded_videos = self._load_downloaded_videos()
         
+        self.discovery_config = config.get('bilibili', {}).get('discovery', {})
+        
+        # B站接口限速，实时检查和历史回填共用
+        self.rate_limiter = RateLimiter(config.get('bilibili', {}).get('api_rate_limit', 2))
+        
+        # 运行时状态（仅保存在内存中，供状态接口读取）
+        self._state_lock = threading.RLock()
+        # 保证索引文件按快照顺序写入，写文件时不占用状态锁
+        self._index_write_lock = threading.Lock()
+        self.cycle_state = {
+            'status': 'idle',
+            'current_mid': None,
+            'cycle_count': 0,
+            'started_at': None,
+            'finished_at': None
+        }
+        self.up_state = {
+            str(up_mid): {'last_poll': None, 'watermark': None}
+            for up_mid in self.up_list
+        }
+        self.download_queue = deque()
+        self.backfill_queue = deque()
+        self.active_downloads = {}
+        self.downloads_paused = threading.Event()
+        self.tier_stats = {}
+        
+        # 控制命令队列，由调度线程消费
+        self._commands = queue.Queue()
+        
+        self._staging_reaped = False
+        
+    @cached_property
+    def governor(self):
+        """带宽控制器（首次使用时创建）"""
+        from bandwidth_governor import BandwidthGovernor
+        return BandwidthGovernor(
+            self.config.get('bandwidth', {}),
+            max_concurrency=self.config.get('settings', {}).get('max_threads', 4)
+        )
+    
+    @cached_property
+    def downloader(self):
+        """视频下载器（首次使用时创建）"""
+        from bilibili_downloader import BilibiliDownloader
+        return BilibiliDownloader(
+            self.download_dir,
+            governor=self.governor,
+            temp_dir=self.config.get('paths', {}).get('temp_dir'),
+            preallocate=self.config.get('bilibili', {}).get('preallocate', True)
+        )
+    
+    @cached_property
+    def file_manager(self):
+        """文件管理器（首次使用时创建）"""
+        from file_manager import FileManager
+        return FileManager(self.download_dir)
+    
+    @cached_property
+    def discovery_cache(self):
+        """投稿列表缓存（首次使用时创建）"""
+        from discovery_cache import DiscoveryCache
+        data_dir = Path(self.config.get('paths', {}).get('data_dir', 'data'))
+        return DiscoveryCache(
+            ttl=self.discovery_config.get('cache_ttl', 0),
+            cache_file=str(data_dir / 'discovery_cache.json')
+        )
+    
+    def reap_staging(self):
+        """清理上次运行遗留的暂存目录，每个进程只执行一次
+        
+        Returns:
+            清理的目录数量
+        """
+        if self._staging_reaped:
+            return 0
+        self._staging_reaped = True
+        
+        from bilibili_downloader import BilibiliDownloader
+        staging_dir = BilibiliDownloader.get_staging_dir(self.config.get('paths', {}).get('temp_dir'))
+        return BilibiliDownloader.reap_staging_dir(staging_dir)
+    
     def _load_downloaded_videos(self):
         """加载已下载视频信息"""
         if not self.video_info_file.exists():
@@ -64,40 +177,80 @@ class BilibiliMonitor:
             return {}
     
     def _save_downloaded_videos(self):
-        """保存已下载视频信息"""
+        """保存已下载视频信息（状态锁内只生成快照，写文件时不阻塞状态接口和下载进度更新）"""
         try:
-            with open(self.video_info_file, 'w', encoding='utf-8') as f:
-                json.dump(self.downloaded_videos, f, ensure_ascii=False, indent=2)
+            with self._index_write_lock:
+                with self._state_lock:
+                    content = json.dumps(self.downloaded_videos, ensure_ascii=False, indent=2)
+                
+                # 先写临时文件再替换，保证索引文件始终完整
+                temp_file = self.video_info_file.with_suffix('.tmp')
+                os.makedirs(self.download_dir, exist_ok=True)
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                os.replace(temp_file, self.video_info_file)
         except Exception as e:
             logger.error(f"保存视频信息文件失败: {e}")
     
-    def get_up_latest_videos(self, up_mid):
-        """获取UP主最新视频
+    def get_up_videos_page(self, up_mid, page=1, page_size=10):
+        """获取UP主投稿列表的一页
         
         Args:
             up_mid: UP主的用户ID
+            page: 页码，从1开始
+            page_size: 每页视频数
             
         Returns:
-            最新视频列表
+            接口返回的data字典（包含list和page），失败时返回None
         """
+        import requests
+        
         try:
+            self.rate_limiter.wait()
+            
             # B站API获取UP主视频列表
-            url = f"https://api.bilibili.com/x/space/arc/search?mid={up_mid}&ps=10&pn=1"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(url, headers=headers)
+            url = f"https://api.bilibili.com/x/space/arc/search?mid={up_mid}&ps={page_size}&pn={page}"
+            response = requests.get(url, headers=HEADERS)
             data = response.json()
             
             if data['code'] != 0:
                 logger.error(f"获取UP主视频列表失败: {data['message']}")
-                return []
+                return None
             
-            videos = data['data']['list']['vlist']
-            return videos
+            return data['data']
         except Exception as e:
             logger.error(f"获取UP主视频列表异常: {e}")
+            return None
+    
+    def get_up_latest_videos(self, up_mid):
+        """获取UP主最新视频
+        
+        Args:
+            up_mid: UP主的用户ID
+            
+        Returns:
+            最新视频列表
+        """
+        data = self.get_up_videos_page(up_mid)
+        if data is None:
             return []
+        return data['list']['vlist']
+    
+    def _now_str(self):
+        """当前时间字符串"""
+        return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    def _update_download_progress(self, video_id, bytes_done):
+        """更新正在下载视频的进度
+        
+        Args:
+            video_id: 视频ID
+            bytes_done: 已下载字节数
+        """
+        with self._state_lock:
+            active = self.active_downloads.get(video_id)
+            if active is not None:
+                active['bytes_done'] = bytes_done
     
     def download_video(self, video):
         """下载视频
@@ -113,55 +266,376 @@ class BilibiliMonitor:
             video_title = video['title']
             up_name = video['author']
             
-            # 创建UP主目录
-            up_dir = self.download_dir / up_name
-            os.makedirs(up_dir, exist_ok=True)
-            
-            # 视频文件名
-            video_filename = f"{video_title}_{video_id}.mp4"
-            video_path = up_dir / video_filename
-            
             # 如果已经下载过，跳过
             if video_id in self.downloaded_videos:
                 logger.info(f"视频已下载过: {video_title}")
                 return True
             
-            # 这里使用you-get或其他工具下载视频
-            # 实际使用时需要替换为真实的下载逻辑
-            logger.info(f"开始下载视频: {video_title}")
+            log_extra = {'mid': video.get('mid'), 'bvid': video_id, 'stage': 'download'}
+            logger.info(f"开始下载视频: {video_title}", extra=log_extra)
+            started = time.monotonic()
+            with self._state_lock:
+                self.active_downloads[video_id] = {
+                    'title': video_title,
+                    'up_name': up_name,
+                    'started_at': time.time(),
+                    'bytes_done': 0
+                }
             
-            # 模拟下载过程
-            # 实际项目中，可以使用subprocess调用you-get或其他下载工具
-            # 例如: subprocess.run(['you-get', '-o', str(up_dir), f'https://www.bilibili.com/video/{video_id}'])
-            time.sleep(2)  # 模拟下载时间
+            try:
+                result = self.downloader.download_video(
+                    video_id,
+                    up_name,
+                    progress_callback=lambda bytes_done: self._update_download_progress(video_id, bytes_done)
+                )
+            finally:
+                with self._state_lock:
+                    self.active_downloads.pop(video_id, None)
+            
+            duration_ms = int((time.monotonic() - started) * 1000)
+            if not result['success']:
+                logger.error(f"下载视频失败: {result['message']}", extra=dict(log_extra, duration_ms=duration_ms))
+                # 下次检查时重新比对该UP主的投稿列表，以便重试
+                self.discovery_cache.invalidate(video.get('mid'))
+                return False
+            
+            # 视频文件路径
+            video_path = result.get('file_path') or str(self.download_dir / up_name / f"{video_title}_{video_id}.mp4")
             
             # 记录下载信息
-            download_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.downloaded_videos[video_id] = {
-                'title': video_title,
-                'up_name': up_name,
-                'download_time': download_time,
-                'path': str(video_path)
-            }
+            with self._state_lock:
+                self.downloaded_videos[video_id] = {
+                    'title': video_title,
+                    'up_name': up_name,
+                    'download_time': self._now_str(),
+                    'path': video_path
+                }
             self._save_downloaded_videos()
             
-            logger.info(f"视频下载完成: {video_title}")
+            logger.info(f"视频下载完成: {video_title}", extra=dict(log_extra, duration_ms=duration_ms))
             return True
         except Exception as e:
             logger.error(f"下载视频失败: {e}")
+            self.discovery_cache.invalidate(video.get('mid'))
             return False
     
-    def check_and_download_new_videos(self):
-        """检查并下载新视频"""
-        for up_mid in self.up_list:
-            logger.info(f"检查UP主 {up_mid} 的最新视频")
-            videos = self.get_up_latest_videos(up_mid)
+    def get_feed_videos(self):
+        """通过动态接口一次获取所关注UP主的最新视频投稿
+        
+        Returns:
+            {UP主ID: 视频列表} 字典，失败时返回None
+        """
+        import requests
+        
+        sessdata = self.discovery_config.get('feed', {}).get('sessdata')
+        try:
+            self.rate_limiter.wait()
+            self.discovery_cache.record_feed_call()
+            response = requests.get(FEED_URL, headers=dict(HEADERS, Cookie=f"SESSDATA={sessdata}"))
+            data = response.json()
+            
+            if data['code'] != 0:
+                logger.error(f"获取动态列表失败: {data['message']}")
+                return None
+            
+            feed = {}
+            for card in data['data'].get('cards') or []:
+                desc = card['desc']
+                detail = json.loads(card.get('card') or '{}')
+                feed.setdefault(str(desc['uid']), []).append({
+                    'bvid': desc['bvid'],
+                    'title': detail.get('title', ''),
+                    'author': detail.get('owner', {}).get('name', ''),
+                    'created': desc.get('timestamp')
+                })
+            return feed
+        except Exception as e:
+            logger.error(f"获取动态列表异常: {e}")
+            return None
+    
+    def check_up(self, up_mid, force=False):
+        """检查单个UP主的新视频并加入下载队列
+        
+        Args:
+            up_mid: UP主的用户ID
+            force: 是否忽略缓存有效期，立即请求
+            
+        Returns:
+            新发现的视频数量
+        """
+        up_mid = str(up_mid)
+        if not force and self.discovery_cache.is_fresh(up_mid):
+            logger.debug(f"UP主 {up_mid} 的缓存仍在有效期内，跳过检查", extra={'mid': up_mid, 'stage': 'poll'})
+            return 0
+        
+        started = time.monotonic()
+        logger.info(f"检查UP主 {up_mid} 的最新视频", extra={'mid': up_mid, 'stage': 'poll'})
+        with self._state_lock:
+            self.cycle_state['current_mid'] = up_mid
+        
+        data = self.get_up_videos_page(up_mid)
+        if data is None:
+            return 0
+        videos = data['list']['vlist'] or []
+        unchanged = self.discovery_cache.update(up_mid, videos)
+        
+        new_count = 0
+        with self._state_lock:
+            state = self.up_state.setdefault(up_mid, {'last_poll': None, 'watermark': None})
+            state['last_poll'] = self._now_str()
+            if unchanged:
+                # 投稿列表与上次相同，无需与已下载索引比对
+                logger.info(f"UP主 {up_mid} 的投稿列表没有变化", extra={'mid': up_mid, 'stage': 'poll'})
+                return 0
             
+            queued = self._queued_video_ids()
             for video in videos:
+                created = video.get('created')
+                if created and (state['watermark'] is None or created > state['watermark']):
+                    state['watermark'] = created
+                
                 video_id = video['bvid']
-                if video_id not in self.downloaded_videos:
-                    logger.info(f"发现新视频: {video['title']}")
-                    self.download_video(video)
+                if video_id not in self.downloaded_videos and video_id not in queued:
+                    logger.info(f"发现新视频: {video['title']}", extra={'mid': up_mid, 'bvid': video_id, 'stage': 'poll'})
+                    self.download_queue.append(dict(video, mid=up_mid))
+                    queued.add(video_id)
+                    new_count += 1
+        
+        logger.info(
+            f"UP主 {up_mid} 检查完成，新视频 {new_count} 个",
+            extra={'mid': up_mid, 'stage': 'poll', 'duration_ms': int((time.monotonic() - started) * 1000)}
+        )
+        return new_count
+    
+    def _queued_video_ids(self):
+        """获取所有队列中的视频ID"""
+        with self._state_lock:
+            return {item['bvid'] for item in self.download_queue} | {item['bvid'] for item in self.backfill_queue}
+    
+    def enqueue_backfill(self, up_mid, videos):
+        """将历史回填发现的视频加入低优先级下载队列
+        
+        Args:
+            up_mid: UP主的用户ID
+            videos: 视频信息列表
+            
+        Returns:
+            加入队列的视频数量
+        """
+        count = 0
+        with self._state_lock:
+            queued = self._queued_video_ids()
+            for video in videos:
+                video_id = video['bvid']
+                if video_id not in self.downloaded_videos and video_id not in queued:
+                    self.backfill_queue.append(dict(video, mid=str(up_mid)))
+                    queued.add(video_id)
+                    count += 1
+        return count
+    
+    def _next_queued_video(self, include_backfill=True):
+        """取出下一个待下载视频，实时检查发现的视频优先于历史回填
+        
+        Args:
+            include_backfill: 实时队列为空时是否从历史回填队列中取视频
+        
+        Returns:
+            视频信息，队列为空时返回None
+        """
+        with self._state_lock:
+            if self.download_queue:
+                return self.download_queue.popleft()
+            if include_backfill and self.backfill_queue:
+                return self.backfill_queue.popleft()
+            return None
+    
+    def _download_in_slot(self, video):
+        """在已占用的下载名额中下载视频，结束后释放名额
+        
+        Args:
+            video: 视频信息
+        """
+        try:
+            self.download_video(video)
+        finally:
+            self.governor.release()
+    
+    def process_download_queue(self, include_backfill=True, should_yield=None):
+        """并发下载队列中的视频，并发数由带宽控制器调整；暂停下载时保留队列
+        
+        Args:
+            include_backfill: 是否下载历史回填队列中的视频
+            should_yield: 判断函数，返回True时不再从历史回填队列中取视频，
+                使到期的定时任务和控制命令不必等待整个回填队列下载完成
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        def backfill_allowed():
+            return include_backfill and not (should_yield and should_yield())
+        
+        with ThreadPoolExecutor(max_workers=self.governor.max_concurrency, thread_name_prefix='download') as executor:
+            while True:
+                with self._state_lock:
+                    if not self.download_queue and not (self.backfill_queue and backfill_allowed()):
+                        return
+                
+                self.governor.acquire()
+                if self.downloads_paused.is_set():
+                    self.governor.release()
+                    with self._state_lock:
+                        pending = len(self.download_queue) + len(self.backfill_queue)
+                    logger.info(f"下载已暂停，队列中保留 {pending} 个视频")
+                    return
+                
+                # 等待下载名额期间可能已有到期的任务，取视频前重新判断
+                video = self._next_queued_video(backfill_allowed())
+                if video is None:
+                    self.governor.release()
+                    return
+                # 在当前线程创建下载器，避免多个下载线程同时创建
+                self.downloader
+                executor.submit(self._download_in_slot, video)
+    
+    def check_and_download_new_videos(self):
+        """检查并下载新视频"""
+        self.reap_staging()
+        with self._state_lock:
+            self.cycle_state['status'] = 'polling'
+            self.cycle_state['started_at'] = self._now_str()
+        
+        try:
+            # 启用批量发现时，先用一次动态接口请求确认哪些UP主没有新投稿
+            feed = None
+            if self.discovery_config.get('feed', {}).get('enabled'):
+                feed = self.get_feed_videos()
+            max_age = self.discovery_config.get('feed', {}).get('fallback_hours', 6) * 3600
+            
+            # 动态接口只返回一页，最早一条投稿的时间决定了结果覆盖的时间范围
+            feed_since = min(
+                (video.get('created') or 0 for videos in (feed or {}).values() for video in videos),
+                default=None
+            )
+            
+            for up_mid in self.up_list:
+                up_mid = str(up_mid)
+                if feed is not None and self.discovery_cache.covered_by_feed(
+                    up_mid, feed.get(up_mid, []), max_age, feed_since
+                ):
+                    with self._state_lock:
+                        self.up_state.setdefault(up_mid, {'last_poll': None, 'watermark': None})['last_poll'] = self._now_str()
+                    continue
+                self.check_up(up_mid)
+            
+            logger.info(f"发现缓存统计: {self.discovery_cache.get_stats()}", extra={'stage': 'poll'})
+            
+            with self._state_lock:
+                self.cycle_state['status'] = 'downloading'
+                self.cycle_state['current_mid'] = None
+            # 历史回填队列由调度线程在空闲时处理，不拖延本轮检查
+            self.process_download_queue(include_backfill=False)
+        finally:
+            with self._state_lock:
+                self.cycle_state['status'] = 'idle'
+                self.cycle_state['current_mid'] = None
+                self.cycle_state['cycle_count'] += 1
+                self.cycle_state['finished_at'] = self._now_str()
+            self.discovery_cache.save(
+                is_complete=lambda bvids: all(video_id in self.downloaded_videos for video_id in bvids)
+            )
+    
+    def _cold_path(self, video_path):
+        """计算视频在冷存储目录中的路径，保持相对下载目录的路径不变
+        
+        Args:
+            video_path: 视频在下载目录中的路径
+            
+        Returns:
+            冷存储路径
+        """
+        try:
+            relative = video_path.relative_to(self.download_dir)
+        except ValueError:
+            relative = Path(video_path.parent.name) / video_path.name
+        return self.cold_dir / relative
+    
+    def tier_videos(self):
+        """将超过分层天数的视频从下载目录分批移动到冷存储目录
+        
+        Returns:
+            移动到冷存储的视频数量
+        """
+        if self.cold_dir is None:
+            return 0
+        
+        started = time.monotonic()
+        now = datetime.datetime.now()
+        candidates = []
+        with self._state_lock:
+            for video_id, info in self.downloaded_videos.items():
+                if info.get('tier') == 'cold':
+                    continue
+                download_time = datetime.datetime.strptime(info['download_time'], '%Y-%m-%d %H:%M:%S')
+                if (now - download_time).days > self.tier_after_days:
+                    candidates.append((video_id, Path(info['path'])))
+        
+        moved = 0
+        for start in range(0, len(candidates), self.tier_batch_size):
+            moves = []
+            move_ids = []
+            updates = {}
+            for video_id, video_path in candidates[start:start + self.tier_batch_size]:
+                cold_path = self._cold_path(video_path)
+                if video_path.exists():
+                    moves.append((video_path, cold_path))
+                    move_ids.append(video_id)
+                elif cold_path.exists():
+                    # 上次已移动但未来得及更新索引
+                    updates[video_id] = cold_path
+                else:
+                    logger.warning(f"视频文件不存在，无法移动到冷存储: {video_path}", extra={'bvid': video_id, 'stage': 'tier'})
+            
+            results = self.file_manager.move_files(moves, self.tier_io_workers)
+            for video_id, (_, cold_path), success in zip(move_ids, moves, results):
+                if success:
+                    updates[video_id] = cold_path
+            
+            # 每批移动完成后一次性更新并保存索引
+            with self._state_lock:
+                for video_id, cold_path in updates.items():
+                    info = self.downloaded_videos.get(video_id)
+                    if info is not None:
+                        info['path'] = str(cold_path)
+                        info['tier'] = 'cold'
+            self._save_downloaded_videos()
+            moved += len(updates)
+        
+        logger.info(
+            f"共移动 {moved} 个视频到冷存储",
+            extra={'stage': 'tier', 'duration_ms': int((time.monotonic() - started) * 1000)}
+        )
+        self.report_tier_capacity()
+        return moved
+    
+    def report_tier_capacity(self):
+        """统计并记录各存储层的容量
+        
+        Returns:
+            各存储层容量信息字典
+        """
+        tiers = {'hot': self.file_manager.get_directory_usage(self.download_dir)}
+        if self.cold_dir is not None:
+            tiers['cold'] = self.file_manager.get_directory_usage(self.cold_dir)
+        
+        for name, usage in tiers.items():
+            logger.info(
+                f"存储层 {name}: {usage['path']}，{usage['files']} 个文件，占用 {usage['used_human']}，"
+                f"磁盘剩余 {usage['disk_free_human']}",
+                extra={'stage': 'tier'}
+            )
+        
+        with self._state_lock:
+            self.tier_stats = tiers
+        return tiers
     
     def clean_expired_videos(self):
         """清理过期视频"""
@@ -173,7 +647,7 @@ class BilibiliMonitor:
             days_passed = (now - download_time).days
             
             if days_passed > self.save_days:
-                logger.info(f"视频超过保存期限({self.save_days}天): {info['title']}")
+                logger.info(f"视频超过保存期限({self.save_days}天): {info['title']}", extra={'bvid': video_id, 'stage': 'cleanup'})
                 
                 # 删除视频文件
                 video_path = Path(info['path'])
@@ -188,26 +662,217 @@ class BilibiliMonitor:
                 expired_videos.append(video_id)
         
         # 更新记录
-        for video_id in expired_videos:
-            del self.downloaded_videos[video_id]
+        with self._state_lock:
+            for video_id in expired_videos:
+                del self.downloaded_videos[video_id]
         
         if expired_videos:
             self._save_downloaded_videos()
             logger.info(f"共清理 {len(expired_videos)} 个过期视频")
     
+    def get_index_stats(self):
+        """统计已下载视频索引信息
+        
+        Returns:
+            索引统计字典
+        """
+        with self._state_lock:
+            per_up = {}
+            download_times = []
+            for info in self.downloaded_videos.values():
+                per_up[info['up_name']] = per_up.get(info['up_name'], 0) + 1
+                download_times.append(info['download_time'])
+            
+            return {
+                'total': len(self.downloaded_videos),
+                'per_up': per_up,
+                'oldest': min(download_times) if download_times else None,
+                'newest': max(download_times) if download_times else None,
+                'save_days': self.save_days
+            }
+    
+    def get_status(self):
+        """获取运行时状态快照，只读取内存数据
+        
+        带宽控制器和投稿列表缓存尚未创建时对应字段为None，不在这里创建。
+        
+        Returns:
+            状态信息字典
+        """
+        now = time.time()
+        governor = self.__dict__.get('governor')
+        discovery_cache = self.__dict__.get('discovery_cache')
+        with self._state_lock:
+            active = {}
+            for video_id, info in self.active_downloads.items():
+                elapsed = max(now - info['started_at'], 1e-6)
+                active[video_id] = {
+                    'title': info['title'],
+                    'up_name': info['up_name'],
+                    'elapsed_seconds': round(elapsed, 1),
+                    'bytes_done': info['bytes_done'],
+                    'bytes_per_second': round(info['bytes_done'] / elapsed, 1)
+                }
+            
+            return {
+                'cycle': dict(self.cycle_state),
+                'ups': {mid: dict(state) for mid, state in self.up_state.items()},
+                'queue': [
+                    {'bvid': video['bvid'], 'title': video['title'], 'mid': video.get('mid')}
+                    for video in self.download_queue
+                ],
+                'backfill_queue': [
+                    {'bvid': video['bvid'], 'title': video['title'], 'mid': video.get('mid')}
+                    for video in self.backfill_queue
+                ],
+                'downloads': {
+                    'paused': self.downloads_paused.is_set(),
+                    'active': active,
+                    'governor': governor.get_state() if governor else None
+                },
+                'index': self.get_index_stats(),
+                'tiers': self.tier_stats,
+                'discovery': discovery_cache.get_stats() if discovery_cache else None
+            }
+    
+    def request_poll(self, up_mid):
+        """请求立即检查指定UP主（由调度线程执行）
+        
+        Args:
+            up_mid: UP主的用户ID
+        """
+        self._commands.put(('poll', str(up_mid)))
+    
+    def request_backfill(self, up_mid):
+        """请求回填指定UP主的历史视频（由调度线程执行）
+        
+        Args:
+            up_mid: UP主的用户ID
+        """
+        self._commands.put(('backfill', str(up_mid)))
+    
+    def backfill(self, up_mid, days=None, max_videos=None):
+        """回填UP主的历史视频，发现的视频进入低优先级下载队列
+        
+        Args:
+            up_mid: UP主的用户ID
+            days: 回填最近多少天的视频，默认使用配置
+            max_videos: 最多回填多少个视频，默认使用配置
+            
+        Returns:
+            加入下载队列的视频数量
+        """
+        from history_backfill import HistoryBackfill
+        
+        self.reap_staging()
+        backfill_config = self.config.get('bilibili', {}).get('backfill', {})
+        return HistoryBackfill(self, backfill_config).run(up_mid, days, max_videos)
+    
+    def request_cleanup(self):
+        """请求立即清理过期视频（由调度线程执行）"""
+        self._commands.put(('cleanup', None))
+    
+    def pause_downloads(self):
+        """暂停下载，新发现的视频保留在队列中"""
+        self.downloads_paused.set()
+        logger.info("下载已暂停")
+    
+    def resume_downloads(self):
+        """恢复下载，并由调度线程处理队列中的视频"""
+        self.downloads_paused.clear()
+        logger.info("下载已恢复")
+        self._commands.put(('drain', None))
+    
+    def _process_commands(self, timeout):
+        """等待并执行控制命令
+        
+        Args:
+            timeout: 最长等待时间（秒）
+        """
+        try:
+            command, arg = self._commands.get(timeout=timeout)
+        except queue.Empty:
+            return
+        
+        logger.info(f"执行控制命令: {command} {arg or ''}".strip())
+        try:
+            if command == 'poll':
+                self.check_up(arg, force=True)
+                self.process_download_queue(include_backfill=False)
+            elif command == 'backfill':
+                # 发现的视频由调度线程在空闲时下载
+                self.backfill(arg)
+            elif command == 'cleanup':
+                self.clean_expired_videos()
+            elif command == 'drain':
+                self.process_download_queue(include_backfill=False)
+        except Exception as e:
+            logger.error(f"执行控制命令失败: {e}")
+    
+    def start_status_server(self):
+        """按配置启动本地状态/控制接口，启动失败（如端口被占用）时不影响监控
+        
+        Returns:
+            StatusServer实例，未启用或启动失败时返回None
+        """
+        api_config = self.config.get('status_api', {})
+        if not api_config.get('enabled', False):
+            return None
+        
+        from status_server import StatusServer
+        try:
+            return StatusServer(
+                self,
+                host=api_config.get('host', '127.0.0.1'),
+                port=api_config.get('port', 8765)
+            ).start()
+        except OSError as e:
+            logger.error(f"状态接口启动失败，将在没有状态接口的情况下继续运行: {e}")
+            return None
+    
     def run_scheduler(self):
         """运行定时任务"""
+        import schedule
+        
+        self.reap_staging()
+        
+        # 在启动状态接口之前创建状态接口读取的组件，使状态查询不需要创建组件或访问磁盘
+        self.governor
+        self.discovery_cache
+        
         # 每小时检查新视频
         schedule.every(1).hours.do(self.check_and_download_new_videos)
         
-        # 每天凌晨2点清理过期视频
+        # 每天凌晨1点半将旧视频移动到冷存储，2点清理过期视频
+        schedule.every().day.at("01:30").do(self.tier_videos)
         schedule.every().day.at("02:00").do(self.clean_expired_videos)
         
+        # 启动本地状态/控制接口
+        self.start_status_server()
+        
         logger.info("B站视频监控服务已启动")
         
         while True:
-            schedule.run_pending()
-            time.sleep(60)
+            self._run_scheduler_step(schedule.default_scheduler)
+    
+    def _run_scheduler_step(self, scheduler):
+        """执行一次调度：运行到期的定时任务，空闲时下载历史回填队列，然后处理控制命令
+        
+        Args:
+            scheduler: schedule.Scheduler 实例
+        """
+        scheduler.run_pending()
+        
+        with self._state_lock:
+            backfill_pending = bool(self.backfill_queue) and not self.downloads_paused.is_set()
+        if backfill_pending and self._commands.empty():
+            # 有到期的定时任务或控制命令时停止取回填视频，返回后由下一次调度处理
+            def should_yield():
+                idle_seconds = scheduler.idle_seconds
+                return not self._commands.empty() or (idle_seconds is not None and idle_seconds <= 0)
+            self.process_download_queue(should_yield=should_yield)
+        
+        self._process_commands(timeout=0 if backfill_pending else 60)
 
 
 def main():
@@ -221,15 +886,19 @@ def main():
         with open(config_path, 'r', encoding='utf-8') as f:
             config = json.load(f)
     except Exception as e:
+        setup_logging({})
         logger.error(f"加载配置文件失败: {e}")
         return
     
+    setup_logging(config)
+    
     # 启动监控
     monitor = BilibiliMonitor(config)
     
     if len(sys.argv) > 1 and sys.argv[1] == '--once':
         # 单次运行模式
         monitor.check_and_download_new_videos()
+        monitor.tier_videos()
         monitor.clean_expired_videos()
     else:
         # 定时任务模式
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+视频发现缓存模块
+
+这个模块缓存每个UP主最近一次投稿列表的摘要，用于：
+- 在短时间内重复检查同一UP主时直接跳过请求；
+- 投稿列表没有变化时跳过与已下载索引的比对；
+- 统计缓存命中率，便于调整缓存参数。
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger('discovery_cache')
+
+
+class DiscoveryCache:
+    """UP主投稿列表缓存"""
+    
+    def __init__(self, ttl=0, cache_file=None):
+        """初始化
+        
+        Args:
+            ttl: 缓存有效期（秒），有效期内再次检查同一UP主时不发出请求，0表示不使用
+            cache_file: 缓存持久化文件路径，为None时只保存在内存中
+        """
+        self.ttl = ttl
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.stats = {
+            'requests': 0,
+            'ttl_hits': 0,
+            'unchanged': 0,
+            'changed': 0,
+            'feed_calls': 0,
+            'feed_covered': 0
+        }
+        self._load()
+    
+    def _load(self):
+        """从缓存文件加载"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except Exception as e:
+            logger.error(f"加载发现缓存失败: {e}")
+    
+    def save(self, is_complete=None):
+        """保存缓存到文件
+        
+        Args:
+            is_complete: 判断函数，参数为缓存条目中的视频ID列表；返回False的条目不保存，
+                避免尚未下载完成的视频在下次运行时因命中缓存而被跳过
+        """
+        if not self.cache_file:
+            return
+        
+        with self._lock:
+            entries = {
+                mid: entry for mid, entry in self._entries.items()
+                if is_complete is None or is_complete(entry['bvids'])
+            }
+        
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+            temp_file = f"{self.cache_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(temp_file, self.cache_file)
+        except Exception as e:
+            logger.error(f"保存发现缓存失败: {e}")
+    
+    def _digest(self, videos):
+        """计算投稿列表摘要
+        
+        只使用视频ID和发布时间，播放数等每次请求都会变化的字段不参与计算。
+        
+        Args:
+            videos: 视频信息列表
+        
+        Returns:
+            摘要字符串
+        """
+        identity = [(video['bvid'], video.get('created')) for video in videos]
+        return hashlib.sha1(json.dumps(identity).encode('utf-8')).hexdigest()
+    
+    def is_fresh(self, up_mid):
+        """判断UP主的缓存是否仍在有效期内（命中时计入统计）
+        
+        Args:
+            up_mid: UP主的用户ID
+        
+        Returns:
+            是否可以跳过本次请求
+        """
+        with self._lock:
+            entry = self._entries.get(up_mid)
+            if self.ttl and entry and time.time() - entry['checked_at'] < self.ttl:
+                self.stats['ttl_hits'] += 1
+                return True
+            return False
+    
+    def update(self, up_mid, videos):
+        """记录一次请求结果
+        
+        Args:
+            up_mid: UP主的用户ID
+            videos: 本次获取的视频列表
+        
+        Returns:
+            投稿列表是否与上次相同
+        """
+        digest = self._digest(videos)
+        with self._lock:
+            self.stats['requests'] += 1
+            entry = self._entries.get(up_mid)
+            unchanged = entry is not None and entry['digest'] == digest
+            self.stats['unchanged' if unchanged else 'changed'] += 1
+            now = time.time()
+            self._entries[up_mid] = {
+                'digest': digest,
+                'bvids': [video['bvid'] for video in videos],
+                'watermark': max((video.get('created') or 0 for video in videos), default=0),
+                'fetched_at': now,
+                'checked_at': now,
+                'in_feed': bool(entry and entry.get('in_feed'))
+            }
+            return unchanged
+    
+    def covered_by_feed(self, up_mid, feed_videos, max_age, feed_since=None):
+        """根据批量接口返回的最新投稿判断是否可以跳过对该UP主的单独请求（命中时计入统计）
+        
+        批量接口只返回一页最新投稿，没有出现在其中不能说明UP主没有新投稿（可能未关注，或被其他UP主的投稿挤出）。
+        因此只在以下情况跳过：UP主出现在批量接口中且没有比上次完整获取更新的投稿；或UP主此前在批量接口中出现过，
+        且这一页覆盖的时间范围早于上次完整获取。上次完整获取距今超过 max_age 秒时总是单独请求。
+        
+        Args:
+            up_mid: UP主的用户ID
+            feed_videos: 批量接口中该UP主的视频列表
+            max_age: 距上次完整获取的最长时间（秒），超过后强制单独请求
+            feed_since: 批量接口返回的最早一条投稿的发布时间，没有投稿时为None
+        
+        Returns:
+            是否可以跳过单独请求
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(up_mid)
+            if entry is None or now - entry['fetched_at'] > max_age:
+                return False
+            if feed_videos:
+                entry['in_feed'] = True
+                newest = max(video.get('created') or 0 for video in feed_videos)
+                if newest > entry['watermark']:
+                    return False
+            elif not (entry.get('in_feed') and feed_since is not None and feed_since <= entry['fetched_at']):
+                return False
+            entry['checked_at'] = now
+            self.stats['feed_covered'] += 1
+            return True
+    
+    def record_feed_call(self):
+        """记录一次批量接口请求"""
+        with self._lock:
+            self.stats['feed_calls'] += 1
+    
+    def invalidate(self, up_mid):
+        """使UP主的缓存失效，下次检查时重新请求并比对
+        
+        Args:
+            up_mid: UP主的用户ID
+        """
+        with self._lock:
+            self._entries.pop(up_mid, None)
+    
+    def get_stats(self):
+        """获取缓存统计
+        
+        Returns:
+            统计信息字典，包含各项命中次数和命中率
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        checks = stats['ttl_hits'] + stats['feed_covered'] + stats['requests']
+        stats['request_saved_rate'] = round((stats['ttl_hits'] + stats['feed_covered']) / checks, 3) if checks else None
+        stats['unchanged_rate'] = round(stats['unchanged'] / stats['requests'], 3) if stats['requests'] else None
+        return stats
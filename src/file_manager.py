@@ -8,20 +8,15 @@
 """
 
 import os
+import errno
 import shutil
 import logging
 import datetime
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from logging_setup import setup_logging
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('file_manager.log', encoding='utf-8')
-    ]
-)
 logger = logging.getLogger('file_manager')
 
 
@@ -98,6 +93,120 @@ class FileManager:
             logger.error(f"删除文件失败: {e}")
             return False
     
+    @staticmethod
+    def _copy_preallocated(src, dst):
+        """复制文件，复制前预分配目标文件空间，空间不足时在写入数据前失败
+        
+        Args:
+            src: 源文件路径
+            dst: 目标文件路径
+        """
+        size = os.path.getsize(src)
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            if size and hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(fdst.fileno(), 0, size)
+                except OSError as e:
+                    # 文件系统不支持预分配时直接复制
+                    if e.errno == errno.ENOSPC:
+                        raise
+            shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+        shutil.copystat(src, dst)
+    
+    @staticmethod
+    def replace_file(src, dst):
+        """将文件移动到目标位置，目标位置不会出现不完整的文件
+        
+        同一文件系统内使用原子重命名；跨文件系统时先完整复制（预分配空间）为隐藏的临时文件，
+        再原子重命名，最后删除源文件。
+        
+        Args:
+            src: 源文件路径
+            dst: 目标文件路径（父目录必须已存在）
+            
+        Raises:
+            OSError: 移动失败，此时目标位置保持不变
+        """
+        try:
+            os.replace(src, dst)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            partial = Path(dst).with_name(f".{Path(dst).name}.partial")
+            try:
+                FileManager._copy_preallocated(src, partial)
+                os.replace(partial, dst)
+            finally:
+                if partial.exists():
+                    partial.unlink()
+            os.remove(src)
+    
+    def move_file(self, src, dst):
+        """移动文件
+        
+        Args:
+            src: 源文件路径
+            dst: 目标文件路径
+            
+        Returns:
+            是否移动成功
+        """
+        try:
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            self.replace_file(src, dst)
+            
+            logger.info(f"移动文件: {src} -> {dst}")
+            return True
+        except Exception as e:
+            logger.error(f"移动文件失败: {e}")
+            return False
+    
+    def move_files(self, moves, max_workers=2):
+        """并发移动一批文件，并发数受 max_workers 限制
+        
+        Args:
+            moves: (源文件路径, 目标文件路径) 列表
+            max_workers: 最大并发I/O数
+            
+        Returns:
+            与 moves 顺序对应的是否移动成功列表
+        """
+        if not moves:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='file-move') as executor:
+            return list(executor.map(lambda move: self.move_file(*move), moves))
+    
+    def get_directory_usage(self, directory):
+        """统计目录占用空间及所在磁盘容量
+        
+        Args:
+            directory: 目录路径
+            
+        Returns:
+            容量信息字典
+        """
+        directory = Path(directory)
+        files = 0
+        used = 0
+        for root, _, names in os.walk(directory):
+            for name in names:
+                try:
+                    used += os.path.getsize(os.path.join(root, name))
+                    files += 1
+                except OSError:
+                    continue
+        
+        usage = shutil.disk_usage(directory) if directory.exists() else None
+        return {
+            'path': str(directory),
+            'files': files,
+            'used': used,
+            'used_human': self._format_size(used),
+            'disk_total': usage.total if usage else None,
+            'disk_free': usage.free if usage else None,
+            'disk_free_human': self._format_size(usage.free) if usage else None
+        }
+    
     def get_file_info(self, file_path):
         """获取文件信息
         
@@ -172,6 +281,46 @@ class FileManager:
             logger.error(f"列出文件失败: {e}")
             return []
     
+    def tier_old_files(self, directory, cold_dir, days, pattern=None, batch_size=20, max_workers=2):
+        """将超过指定天数的文件移动到冷存储目录，保持相对路径不变
+        
+        Args:
+            directory: 热存储目录
+            cold_dir: 冷存储目录
+            days: 移动的天数阈值
+            pattern: 文件名匹配模式
+            batch_size: 每批移动的文件数
+            max_workers: 最大并发I/O数
+            
+        Returns:
+            移动的文件数量
+        """
+        try:
+            directory = Path(directory)
+            cold_dir = Path(cold_dir)
+            if not directory.exists():
+                logger.warning(f"目录不存在，无法分层: {directory}")
+                return 0
+            
+            now = datetime.datetime.now()
+            moves = []
+            for file_path in self.list_files(directory, pattern or '**/*'):
+                if not Path(file_path).is_file():
+                    continue
+                file_info = self.get_file_info(file_path)
+                if file_info and (now - file_info['modify_time']).days > days:
+                    moves.append((file_path, cold_dir / Path(file_path).relative_to(directory)))
+            
+            count = 0
+            for start in range(0, len(moves), batch_size):
+                count += sum(self.move_files(moves[start:start + batch_size], max_workers))
+            
+            logger.info(f"共移动 {count} 个文件到冷存储")
+            return count
+        except Exception as e:
+            logger.error(f"移动文件到冷存储失败: {e}")
+            return 0
+    
     def clean_expired_files(self, directory, days, pattern=None):
         """清理过期文件
         
@@ -196,12 +345,14 @@ class FileManager:
             files = self.list_files(directory, pattern)
             
             for file_path in files:
+                if not Path(file_path).is_file():
+                    continue
                 file_info = self.get_file_info(file_path)
                 if not file_info:
                     continue
                 
-                # 计算文件创建时间距今的天数
-                days_old = (now - file_info['create_time']).days
+                # 计算文件修改时间距今的天数（移动到冷存储会更新ctime，但不会改变mtime）
+                days_old = (now - file_info['modify_time']).days
                 
                 if days_old > days:
                     if self.delete_file(file_path):
@@ -218,15 +369,27 @@ def main():
     """测试函数"""
     import sys
     
-    if len(sys.argv) < 3:
-        print("用法: python file_manager.py <目录> <过期天数>")
+    if len(sys.argv) not in (3, 5):
+        print("用法: python file_manager.py <目录> <过期天数> [<冷存储目录> <分层天数>]")
         return
     
     directory = sys.argv[1]
     days = int(sys.argv[2])
     
+    setup_logging({'logging': {'file': 'file_manager.log'}})
+    
     manager = FileManager(directory)
-    count = manager.clean_expired_files(directory, days)
+    pattern = None
+    
+    if len(sys.argv) == 5:
+        # 先将旧文件移动到冷存储，再从冷存储中清理过期文件
+        cold_dir = sys.argv[3]
+        moved = manager.tier_old_files(directory, cold_dir, int(sys.argv[4]))
+        print(f"共移动 {moved} 个文件到冷存储")
+        directory = cold_dir
+        pattern = '**/*'
+    
+    count = manager.clean_expired_files(directory, days, pattern)
     
     print(f"共清理 {count} 个过期文件")
 
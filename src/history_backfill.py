@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+历史视频回填模块
+
+这个模块用于新添加UP主时补充下载其历史视频（最近N天或最近N个视频）。
+投稿列表按页并行获取，受接口限速约束；进度保存在检查点文件中，中断后可以从上次的位置继续。
+发现的视频进入低优先级下载队列，不影响实时检查发现的新视频。
+"""
+
+import os
+import json
+import math
+import time
+import logging
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('history_backfill')
+
+
+class HistoryBackfill:
+    """UP主历史视频回填"""
+    
+    def __init__(self, monitor, config=None):
+        """初始化
+        
+        Args:
+            monitor: BilibiliMonitor实例
+            config: 回填配置字典（config.json中的 bilibili.backfill 部分）
+        """
+        config = config or {}
+        self.monitor = monitor
+        self.days = config.get('days', 30)
+        self.max_videos = config.get('max_videos', 200)
+        self.page_size = config.get('page_size', 30)
+        self.workers = max(1, config.get('workers', 4))
+        
+        data_dir = monitor.config.get('paths', {}).get('data_dir', 'data')
+        self.checkpoint_dir = Path(data_dir) / 'backfill'
+    
+    def _checkpoint_path(self, up_mid):
+        """检查点文件路径"""
+        return self.checkpoint_dir / f"{up_mid}.json"
+    
+    def _load_checkpoint(self, up_mid):
+        """加载检查点
+        
+        Args:
+            up_mid: UP主的用户ID
+        
+        Returns:
+            检查点字典，不存在或无法读取时返回None
+        """
+        path = self._checkpoint_path(up_mid)
+        if not path.exists():
+            return None
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"加载回填检查点失败: {e}")
+            return None
+    
+    def _save_checkpoint(self, checkpoint):
+        """保存检查点（先写临时文件再替换，避免中断时留下不完整的文件）
+        
+        Args:
+            checkpoint: 检查点字典
+        """
+        try:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            path = self._checkpoint_path(checkpoint['mid'])
+            temp_path = path.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.error(f"保存回填检查点失败: {e}")
+    
+    def _new_checkpoint(self, up_mid, days, max_videos):
+        """创建新的检查点"""
+        return {
+            'mid': up_mid,
+            'days': days,
+            'max_videos': max_videos,
+            'cutoff': int(time.time()) - days * 86400 if days else 0,
+            'next_page': 1,
+            'pages_total': None,
+            'done': False,
+            'videos': []
+        }
+    
+    def run(self, up_mid, days=None, max_videos=None):
+        """回填UP主的历史视频
+        
+        Args:
+            up_mid: UP主的用户ID
+            days: 回填最近多少天的视频，0表示不限，默认使用配置
+            max_videos: 最多回填多少个视频，0表示不限，默认使用配置
+        
+        Returns:
+            加入下载队列的视频数量
+        """
+        up_mid = str(up_mid)
+        days = self.days if days is None else days
+        max_videos = self.max_videos if max_videos is None else max_videos
+        log_extra = {'mid': up_mid, 'stage': 'backfill'}
+        started = time.monotonic()
+        
+        checkpoint = self._load_checkpoint(up_mid)
+        if checkpoint and (checkpoint['days'], checkpoint['max_videos']) != (days, max_videos):
+            logger.info(f"回填参数已变化，重新开始回填UP主 {up_mid}", extra=log_extra)
+            checkpoint = None
+        
+        if checkpoint is None:
+            checkpoint = self._new_checkpoint(up_mid, days, max_videos)
+        elif not checkpoint['done']:
+            # 中断期间可能有新投稿导致分页后移，从上一页开始重新获取，重复的视频会被去重
+            checkpoint['next_page'] = max(1, checkpoint['next_page'] - 1)
+            logger.info(f"从第 {checkpoint['next_page']} 页继续回填UP主 {up_mid}", extra=log_extra)
+        
+        seen = {video['bvid'] for video in checkpoint['videos']}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='backfill') as executor:
+            while not checkpoint['done']:
+                start_page = checkpoint['next_page']
+                if checkpoint['pages_total'] is None:
+                    # 第一页用于获取投稿总数
+                    pages = [start_page]
+                else:
+                    pages = list(range(start_page, min(start_page + self.workers, checkpoint['pages_total'] + 1)))
+                    if not pages:
+                        checkpoint['done'] = True
+                        break
+                
+                results = list(executor.map(
+                    lambda page: self.monitor.get_up_videos_page(up_mid, page, self.page_size),
+                    pages
+                ))
+                
+                for page, data in zip(pages, results):
+                    if data is None:
+                        logger.error(f"获取第 {page} 页失败，回填暂停，下次运行将从此处继续", extra=log_extra)
+                        self._save_checkpoint(checkpoint)
+                        return self.monitor.enqueue_backfill(up_mid, checkpoint['videos'])
+                    
+                    if checkpoint['pages_total'] is None:
+                        checkpoint['pages_total'] = math.ceil(data['page']['count'] / self.page_size)
+                    
+                    vlist = data['list']['vlist'] or []
+                    for video in vlist:
+                        if checkpoint['cutoff'] and video.get('created', 0) < checkpoint['cutoff']:
+                            checkpoint['done'] = True
+                            break
+                        if max_videos and len(checkpoint['videos']) >= max_videos:
+                            checkpoint['done'] = True
+                            break
+                        if video['bvid'] not in seen:
+                            seen.add(video['bvid'])
+                            checkpoint['videos'].append({
+                                'bvid': video['bvid'],
+                                'title': video['title'],
+                                'author': video['author'],
+                                'created': video.get('created')
+                            })
+                    
+                    checkpoint['next_page'] = page + 1
+                    if not vlist or page >= checkpoint['pages_total']:
+                        checkpoint['done'] = True
+                    if checkpoint['done']:
+                        break
+                
+                self._save_checkpoint(checkpoint)
+                logger.info(
+                    f"回填UP主 {up_mid}: 已处理到第 {checkpoint['next_page'] - 1}/{checkpoint['pages_total']} 页，"
+                    f"发现 {len(checkpoint['videos'])} 个视频",
+                    extra=log_extra
+                )
+        
+        self._save_checkpoint(checkpoint)
+        count = self.monitor.enqueue_backfill(up_mid, checkpoint['videos'])
+        logger.info(
+            f"UP主 {up_mid} 回填完成，共发现 {len(checkpoint['videos'])} 个视频，加入下载队列 {count} 个",
+            extra=dict(log_extra, duration_ms=int((time.monotonic() - started) * 1000))
+        )
+        return count
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+日志配置模块
+
+这个模块负责统一配置所有模块的日志。日志记录先进入内存队列，由后台线程写入控制台和文件，
+避免在下载、检查等流程中阻塞写盘；日志文件按大小或时间轮转，并可额外输出JSON Lines格式。
+"""
+
+import copy
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+
+DEFAULT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# 通过 extra 传入、需要写入JSON日志的结构化字段
+STRUCTURED_FIELDS = ('mid', 'bvid', 'stage', 'duration_ms')
+
+_listener = None
+_queue_handler = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """JSON Lines日志格式"""
+    
+    def format(self, record):
+        """格式化日志记录
+        
+        Args:
+            record: 日志记录
+        
+        Returns:
+            单行JSON字符串
+        """
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        # 经过队列的记录中异常堆栈已格式化为 exc_text
+        exc_text = record.exc_text or (self.formatException(record.exc_info) if record.exc_info else None)
+        if exc_text:
+            entry['exc_info'] = exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _StructuredQueueHandler(logging.handlers.QueueHandler):
+    """保留异常堆栈的队列日志处理器
+    
+    QueueHandler默认在入队前把异常堆栈合并到消息中；这里改为单独保存在 exc_text 中，
+    文本日志仍在消息后输出堆栈，JSON日志则写入单独的 exc_info 字段。
+    """
+    
+    _exception_formatter = logging.Formatter()
+    
+    def prepare(self, record):
+        """准备入队的日志记录
+        
+        Args:
+            record: 日志记录
+        
+        Returns:
+            可以跨线程传递的日志记录副本
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+def _parse_level(level):
+    """解析日志级别
+    
+    Args:
+        level: 级别名称（如 "info"）或数值
+    
+    Returns:
+        logging级别数值
+    """
+    if isinstance(level, int):
+        return level
+    level = logging.getLevelName(str(level).upper())
+    return level if isinstance(level, int) else logging.INFO
+
+
+def _build_file_handler(path, log_config):
+    """创建带轮转的文件日志处理器
+    
+    Args:
+        path: 日志文件路径
+        log_config: 日志配置字典
+    
+    Returns:
+        日志处理器
+    """
+    backup_count = log_config.get('backup_count', 5)
+    if log_config.get('rotation', 'size') == 'time':
+        return logging.handlers.TimedRotatingFileHandler(
+            path,
+            when=log_config.get('when', 'midnight'),
+            backupCount=backup_count,
+            encoding='utf-8'
+        )
+    return logging.handlers.RotatingFileHandler(
+        path,
+        maxBytes=log_config.get('max_bytes', 10 * 1024 * 1024),
+        backupCount=backup_count,
+        encoding='utf-8'
+    )
+
+
+def setup_logging(config):
+    """根据配置初始化日志，重复调用时直接返回已有配置
+    
+    Args:
+        config: 配置信息字典，读取 settings.log_level 和 logging 部分。
+            settings.log_level 可以是级别名称，也可以是
+            {"default": "info", "<模块名>": "debug"} 形式的按模块配置
+    
+    Returns:
+        后台日志线程（QueueListener）
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _listener
+    
+    log_config = config.get('logging', {})
+    log_level = config.get('settings', {}).get('log_level', 'info')
+    if isinstance(log_level, dict):
+        module_levels = dict(log_level)
+        default_level = module_levels.pop('default', 'info')
+    else:
+        module_levels = {}
+        default_level = log_level
+    
+    text_formatter = logging.Formatter(DEFAULT_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if log_config.get('file', 'bilibili_monitor.log'):
+        handlers.append(_build_file_handler(log_config.get('file', 'bilibili_monitor.log'), log_config))
+    for handler in handlers:
+        handler.setFormatter(text_formatter)
+    
+    if log_config.get('json_file'):
+        json_handler = _build_file_handler(log_config['json_file'], log_config)
+        json_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(json_handler)
+    
+    # 所有模块的日志都先进入队列，由后台线程写出
+    log_queue = queue.Queue(-1)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    _queue_handler = _StructuredQueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    root.setLevel(_parse_level(default_level))
+    
+    for name, level in module_levels.items():
+        logging.getLogger(name).setLevel(_parse_level(level))
+    
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """停止后台日志线程并写出剩余日志"""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    _queue_handler = None
@@ -14,18 +14,9 @@ import argparse
 import logging
 from pathlib import Path
 
-# 导入B站视频监控模块
-from bilibili_monitor import BilibiliMonitor
+# 监控模块及其依赖（requests、schedule等）在确定要执行的命令后再导入，
+# 使 --clean 等命令启动更快
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('bilibili_monitor_main.log', encoding='utf-8')
-    ]
-)
 logger = logging.getLogger('main')
 
 
@@ -46,6 +37,41 @@ def load_config(config_path):
         return {}
 
 
+def up_mid_argument(value):
+    """校验命令行中的UP主ID
+    
+    Args:
+        value: 命令行参数值
+        
+    Returns:
+        UP主ID字符串
+        
+    Raises:
+        argparse.ArgumentTypeError: UP主ID不是数字
+    """
+    if not (value.isascii() and value.isdigit()):
+        raise argparse.ArgumentTypeError(f"UP主ID必须是数字: {value}")
+    return value
+
+
+def bootstrap(config_path):
+    """加载配置并初始化日志，每个进程只执行一次
+    
+    Args:
+        config_path: 配置文件路径
+        
+    Returns:
+        配置信息字典，加载失败时为空字典
+    """
+    from logging_setup import setup_logging
+    
+    config = load_config(config_path)
+    
+    # 初始化日志（配置加载失败时使用默认设置）
+    setup_logging(config)
+    return config
+
+
 def main():
     """主函数"""
     # 解析命令行参数
@@ -53,29 +79,35 @@ def main():
     parser.add_argument('--once', action='store_true', help='单次运行模式，不启动定时任务')
     parser.add_argument('--check', action='store_true', help='仅检查新视频')
     parser.add_argument('--clean', action='store_true', help='仅清理过期视频')
+    parser.add_argument('--tier', action='store_true', help='仅将旧视频移动到冷存储')
+    parser.add_argument('--backfill', metavar='MID', type=up_mid_argument, help='回填指定UP主的历史视频')
+    parser.add_argument('--backfill-days', type=int, help='回填最近多少天的视频（0表示不限）')
+    parser.add_argument('--backfill-limit', type=int, help='最多回填多少个视频（0表示不限）')
+    parser.add_argument('--config', help='配置文件路径，默认为项目目录下的 config/config.json')
     args = parser.parse_args()
     
-    logger.info("欢迎使用B站视频监控系统!")
-    
     # 获取项目根目录
     project_root = Path(__file__).parent.parent
     
     # 加载配置
-    config_path = project_root / 'config' / 'config.json'
-    config = load_config(config_path)
+    config_path = args.config or project_root / 'config' / 'config.json'
+    config = bootstrap(config_path)
+    logger.info("欢迎使用B站视频监控系统!")
     
     if not config:
         logger.error("配置加载失败，程序退出")
         return
     
-    # 检查必要的配置项
-    if 'bilibili' not in config or not config['bilibili'].get('up_list'):
+    # 检查必要的配置项（清理和分层只处理本地数据，不需要UP主列表）
+    local_only = args.clean or args.tier
+    if not local_only and ('bilibili' not in config or not config['bilibili'].get('up_list')):
         logger.error("配置文件中缺少B站UP主列表，请在config.json中配置bilibili.up_list")
         return
     
-    logger.info(f"已加载配置，监控UP主数量: {len(config['bilibili'].get('up_list', []))}")
+    logger.info(f"已加载配置，监控UP主数量: {len(config.get('bilibili', {}).get('up_list', []))}")
     
-    # 创建监控实例
+    # 创建监控实例（下载器、带宽控制等组件在首次使用时才创建）
+    from bilibili_monitor import BilibiliMonitor
     monitor = BilibiliMonitor(config)
     
     # 根据命令行参数执行不同操作
@@ -83,14 +115,24 @@ def main():
         # 仅检查新视频
         logger.info("执行检查新视频任务")
         monitor.check_and_download_new_videos()
+    elif args.backfill:
+        # 回填历史视频
+        logger.info(f"执行UP主 {args.backfill} 的历史视频回填任务")
+        monitor.backfill(args.backfill, args.backfill_days, args.backfill_limit)
+        monitor.process_download_queue()
     elif args.clean:
         # 仅清理过期视频
         logger.info("执行清理过期视频任务")
         monitor.clean_expired_videos()
+    elif args.tier:
+        # 仅移动旧视频到冷存储
+        logger.info("执行冷热分层任务")
+        monitor.tier_videos()
     elif args.once:
         # 单次运行模式
         logger.info("单次运行模式")
         monitor.check_and_download_new_videos()
+        monitor.tier_videos()
         monitor.clean_expired_videos()
     else:
         # 定时任务模式
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地状态/控制接口模块
+
+这个模块在定时任务模式下提供一个轻量级的本地HTTP服务，用于查看监控进程的运行状态，
+并发送控制命令（立即检查UP主、回填历史视频、暂停/恢复下载、立即清理）。
+所有状态均从内存读取，不访问磁盘。
+"""
+
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger('status_server')
+
+
+class _StatusRequestHandler(BaseHTTPRequestHandler):
+    """状态接口请求处理器"""
+    
+    # GET路径与状态快照中字段的对应关系，None表示返回完整快照
+    STATUS_SECTIONS = {
+        '/status': None,
+        '/cycle': 'cycle',
+        '/ups': 'ups',
+        '/queue': 'queue',
+        '/backfill_queue': 'backfill_queue',
+        '/downloads': 'downloads',
+        '/index': 'index'
+    }
+    
+    def _send_json(self, code, payload):
+        """发送JSON响应
+        
+        Args:
+            code: HTTP状态码
+            payload: 响应内容
+        """
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        """处理状态查询"""
+        path = self.path.split('?', 1)[0].rstrip('/') or '/status'
+        if path not in self.STATUS_SECTIONS:
+            self._send_json(404, {'error': f'未知路径: {path}'})
+            return
+        
+        status = self.server.monitor.get_status()
+        section = self.STATUS_SECTIONS[path]
+        self._send_json(200, status if section is None else status[section])
+    
+    def do_POST(self):
+        """处理控制命令"""
+        monitor = self.server.monitor
+        path = self.path.split('?', 1)[0].rstrip('/')
+        parts = path.strip('/').split('/')
+        
+        if len(parts) == 2 and parts[0] == 'poll':
+            up_mid = parts[1]
+            if up_mid not in [str(mid) for mid in monitor.up_list]:
+                self._send_json(404, {'error': f'UP主不在监控列表中: {up_mid}'})
+                return
+            monitor.request_poll(up_mid)
+            self._send_json(202, {'accepted': 'poll', 'mid': up_mid})
+        elif len(parts) == 2 and parts[0] == 'backfill':
+            up_mid = parts[1]
+            # UP主ID会用于接口请求和检查点文件名，只接受数字
+            if not (up_mid.isascii() and up_mid.isdigit()):
+                self._send_json(400, {'error': f'UP主ID必须是数字: {up_mid}'})
+                return
+            monitor.request_backfill(up_mid)
+            self._send_json(202, {'accepted': 'backfill', 'mid': up_mid})
+        elif path == '/downloads/pause':
+            monitor.pause_downloads()
+            self._send_json(200, {'paused': True})
+        elif path == '/downloads/resume':
+            monitor.resume_downloads()
+            self._send_json(200, {'paused': False})
+        elif path == '/cleanup':
+            monitor.request_cleanup()
+            self._send_json(202, {'accepted': 'cleanup'})
+        else:
+            self._send_json(404, {'error': f'未知路径: {path}'})
+    
+    def log_message(self, format, *args):
+        """将访问日志写入模块日志"""
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+class StatusServer:
+    """本地状态/控制HTTP服务"""
+    
+    def __init__(self, monitor, host='127.0.0.1', port=8765):
+        """初始化
+        
+        Args:
+            monitor: BilibiliMonitor实例
+            host: 监听地址
+            port: 监听端口，0表示随机端口
+        """
+        self.httpd = ThreadingHTTPServer((host, port), _StatusRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.monitor = monitor
+        self._thread = None
+    
+    @property
+    def address(self):
+        """实际监听的(地址, 端口)"""
+        return self.httpd.server_address
+    
+    def start(self):
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='status-server', daemon=True)
+        self._thread.start()
+        host, port = self.address[:2]
+        logger.info(f"状态接口已启动: http://{host}:{port}/status")
+        return self
+    
+    def stop(self):
+        """停止服务"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+带宽控制测试文件
+
+这个文件包含了对带宽控制器的测试用例。
+"""
+
+import sys
+import time
+import datetime
+import unittest
+from pathlib import Path
+
+# 添加源代码目录到系统路径
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from bandwidth_governor import BandwidthGovernor
+
+
+class TestBandwidthGovernor(unittest.TestCase):
+    """测试带宽控制功能"""
+    
+    def test_time_windows(self):
+        """测试按时间段获取带宽上限"""
+        governor = BandwidthGovernor({
+            'default_limit': 0,
+            'windows': [
+                {'start': '09:00', 'end': '18:00', 'limit': 1000},
+                {'start': '22:00', 'end': '06:00', 'limit': 5000}
+            ]
+        })
+        self.assertEqual(governor.current_limit(datetime.datetime(2024, 1, 1, 10, 0)), 1000)
+        self.assertEqual(governor.current_limit(datetime.datetime(2024, 1, 1, 20, 0)), 0)
+        self.assertEqual(governor.current_limit(datetime.datetime(2024, 1, 1, 23, 0)), 5000)
+        self.assertEqual(governor.current_limit(datetime.datetime(2024, 1, 1, 3, 0)), 5000)
+    
+    def test_throttle_over_limit(self):
+        """测试超过带宽上限时返回暂停时间"""
+        governor = BandwidthGovernor({'default_limit': 1000})
+        self.assertEqual(governor.report('BV1', 500), 0)
+        delay = governor.report('BV1', 3000)
+        self.assertGreater(delay, 1.0)
+    
+    def test_unlimited(self):
+        """测试不限速时不需要暂停"""
+        governor = BandwidthGovernor()
+        self.assertEqual(governor.report('BV1', 10 ** 9), 0)
+    
+    def _run_window(self, governor, throughput):
+        """模拟一个统计窗口内的吞吐量并触发调整"""
+        with governor._condition:
+            governor._reset_window(time.monotonic() - 10)
+            governor._window_bytes = throughput * 10
+            governor._adjust(time.monotonic())
+    
+    def test_additive_increase_and_backoff(self):
+        """测试吞吐量增长时增加并发，增长停滞时回退"""
+        governor = BandwidthGovernor({'max_concurrency': 4})
+        governor.acquire()
+        
+        self._run_window(governor, 1000)
+        self.assertEqual(governor.concurrency, 2)
+        
+        governor.acquire()
+        self._run_window(governor, 2000)
+        self.assertEqual(governor.concurrency, 3)
+        
+        governor.acquire()
+        self._run_window(governor, 2010)
+        self.assertEqual(governor.concurrency, 2)
+        self.assertEqual(governor.get_state()['last_decision'], 'backoff')
+    
+    def test_hold_at_limit(self):
+        """测试达到带宽上限时不增加并发"""
+        governor = BandwidthGovernor({'default_limit': 1000, 'max_concurrency': 4})
+        governor.acquire()
+        self._run_window(governor, 1000)
+        self.assertEqual(governor.concurrency, 1)
+    
+    def _busy_governor(self):
+        """创建4个下载名额均已占用、并已记录吞吐量基准的控制器"""
+        governor = BandwidthGovernor({'max_concurrency': 4})
+        governor.concurrency = 4
+        for _ in range(4):
+            governor.acquire()
+        self._run_window(governor, 100000)
+        return governor
+    
+    def test_idle_gap_does_not_backoff(self):
+        """测试两轮下载之间的空闲时间不计入吞吐量"""
+        governor = self._busy_governor()
+        for _ in range(4):
+            governor.release()
+        
+        # 空闲一小时后开始下一轮下载
+        with governor._condition:
+            governor._window_start -= 3600
+            governor._active_since -= 3600
+        governor.acquire()
+        governor.report('BV1', 1000)
+        self.assertEqual(governor.concurrency, 4)
+        self.assertIsNone(governor.get_state()['last_throughput'])
+    
+    def test_draining_queue_does_not_backoff(self):
+        """测试队列快下载完、名额未用满时不因吞吐量下降而回退"""
+        governor = self._busy_governor()
+        for _ in range(3):
+            governor.release()
+        
+        self._run_window(governor, 1000)
+        self.assertEqual(governor.concurrency, 4)
+        self.assertEqual(governor.get_state()['last_decision'], 'hold')
+        self.assertAlmostEqual(governor.get_state()['last_throughput'], 100000, delta=100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+视频下载模块测试文件
+
+这个文件包含了对暂存下载和发布功能的测试用例。
+"""
+
+import os
+import sys
+import stat
+import time
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# 添加源代码目录到系统路径
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from bilibili_downloader import BilibiliDownloader
+from bilibili_monitor import BilibiliMonitor
+
+# 模拟you-get：-i 输出视频信息，-o 将视频写入输出目录
+FAKE_YOU_GET = '''#!/bin/sh
+if [ "$1" = "--version" ]; then echo "you-get 0.4.0"; exit 0; fi
+if [ "$1" = "-i" ]; then printf "Title: test\\nSize: 0.0 MiB (12 bytes)\\n"; exit 0; fi
+if [ "$1" = "-o" ]; then
+    if [ -n "$FAKE_TITLE" ]; then printf "$(basename "$3")" > "$2/$FAKE_TITLE.mp4"; exit 0; fi
+    printf "video-data\\n" > "$2/test_$(basename "$3").mp4"
+    printf "partial" > "$2/other.mp4.download"
+    exit 0
+fi
+exit 1
+'''
+
+
+@unittest.skipIf(os.name != 'posix', '需要POSIX shell')
+class TestBilibiliDownloader(unittest.TestCase):
+    """测试暂存下载功能"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = self.root = Path(self.temp_dir.name)
+        
+        bin_dir = root / 'bin'
+        bin_dir.mkdir()
+        you_get = bin_dir / 'you-get'
+        you_get.write_text(FAKE_YOU_GET)
+        you_get.chmod(you_get.stat().st_mode | stat.S_IEXEC)
+        self.path_patch = mock.patch.dict(os.environ, {'PATH': f"{bin_dir}{os.pathsep}{os.environ['PATH']}"})
+        self.path_patch.start()
+        
+        self.downloader = BilibiliDownloader(root / 'downloads', temp_dir=root / 'tmp')
+    
+    def tearDown(self):
+        """测试后清理"""
+        self.path_patch.stop()
+        self.temp_dir.cleanup()
+    
+    def test_download_is_staged_and_published(self):
+        """测试下载先写入暂存目录，完成后发布到UP主目录"""
+        result = self.downloader.download_video('BV1xx', '测试UP主')
+        self.assertTrue(result['success'])
+        
+        file_path = Path(result['file_path'])
+        self.assertEqual(file_path.parent, self.downloader.download_dir / '测试UP主')
+        self.assertEqual(file_path.name, 'test_BV1xx.mp4')
+        self.assertFalse((file_path.parent / 'other.mp4.download').exists())
+        self.assertEqual(list(self.downloader.staging_dir.iterdir()), [])
+    
+    def test_publish_across_filesystems(self):
+        """测试跨文件系统时复制发布"""
+        real_replace = os.replace
+        
+        def replace(src, dst):
+            if not Path(src).name.startswith('.'):
+                raise OSError(18, 'Invalid cross-device link')
+            return real_replace(src, dst)
+        
+        with mock.patch('file_manager.os.replace', side_effect=replace):
+            result = self.downloader.download_video('BV1xx', '测试UP主')
+        self.assertTrue(result['success'])
+        self.assertEqual(Path(result['file_path']).read_text(), 'video-data\n')
+    
+    def test_same_title_does_not_overwrite(self):
+        """测试不同视频的文件同名时不覆盖已下载的文件"""
+        with mock.patch.dict(os.environ, {'FAKE_TITLE': '直播回放'}):
+            first = self.downloader.download_video('BV1xx', '测试UP主')
+            second = self.downloader.download_video('BV2xx', '测试UP主')
+        self.assertTrue(first['success'])
+        self.assertTrue(second['success'])
+        self.assertNotEqual(first['file_path'], second['file_path'])
+        self.assertEqual(Path(first['file_path']).read_text(), 'BV1xx')
+        self.assertEqual(Path(second['file_path']).read_text(), 'BV2xx')
+        self.assertEqual(Path(second['file_path']).name, '直播回放_BV2xx.mp4')
+    
+    def test_merge_output_not_counted_as_network(self):
+        """测试ffmpeg合并分段时写入的文件不计入下载流量"""
+        job_dir = self.root / 'job'
+        job_dir.mkdir()
+        since = time.time() - 1
+        counted = {}
+        
+        (job_dir / '视频[00].mp4.download').write_bytes(b'v' * 600)
+        (job_dir / '视频[01].m4a.download').write_bytes(b'a' * 200)
+        self.assertEqual(self.downloader._network_bytes_since(job_dir, since, counted), 800)
+        
+        (job_dir / '视频[00].mp4.download').rename(job_dir / '视频[00].mp4')
+        (job_dir / '视频[01].m4a.download').rename(job_dir / '视频[01].m4a')
+        self.assertEqual(self.downloader._network_bytes_since(job_dir, since, counted), 800)
+        
+        # 合并输出写入后删除分段
+        (job_dir / '视频.mp4').write_bytes(b'm' * 800)
+        self.assertEqual(self.downloader._network_bytes_since(job_dir, since, counted), 800)
+        (job_dir / '视频[00].mp4').unlink()
+        (job_dir / '视频[01].m4a').unlink()
+        self.assertEqual(self.downloader._network_bytes_since(job_dir, since, counted), 800)
+    
+    def test_direct_write_counted_as_network(self):
+        """测试大小未知、直接写入最终文件名的下载仍计入流量"""
+        job_dir = self.root / 'job'
+        job_dir.mkdir()
+        (job_dir / '视频.flv').write_bytes(b'v' * 300)
+        self.assertEqual(self.downloader._network_bytes_since(job_dir, time.time() - 1, {}), 300)
+    
+    def test_out_of_space(self):
+        """测试空间不足时不开始下载"""
+        with mock.patch('bilibili_downloader.shutil.disk_usage', return_value=mock.Mock(free=1)):
+            result = self.downloader.download_video('BV1xx', '测试UP主')
+        self.assertFalse(result['success'])
+        self.assertEqual(list(self.downloader.staging_dir.iterdir()), [])
+    
+    def test_reap_orphaned_staging(self):
+        """测试清理已退出进程遗留的暂存目录"""
+        orphan = self.downloader.staging_dir / 'BV1xx.999999999.abc'
+        orphan.mkdir()
+        own = self.downloader.staging_dir / f'BV2xx.{os.getpid()}.abc'
+        own.mkdir()
+        
+        self.assertEqual(self.downloader.reap_staging(), 1)
+        self.assertFalse(orphan.exists())
+        self.assertTrue(own.exists())
+    
+    def test_monitor_reaps_without_downloading(self):
+        """测试没有新视频可下载时也会清理遗留的暂存目录"""
+        orphan = self.downloader.staging_dir / 'BV1xx.999999999.abc'
+        orphan.mkdir()
+        monitor = BilibiliMonitor({
+            'bilibili': {'up_list': ['1'], 'download_dir': str(self.root / 'downloads')},
+            'paths': {'data_dir': str(self.root / 'data'), 'temp_dir': str(self.root / 'tmp')}
+        })
+        monitor.get_up_videos_page = lambda up_mid, page=1, page_size=10: {'list': {'vlist': []}}
+        
+        monitor.check_and_download_new_videos()
+        self.assertFalse(orphan.exists())
+        self.assertNotIn('downloader', monitor.__dict__)
+
+
+if __name__ == '__main__':
+    unittest.main()
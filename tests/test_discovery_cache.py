@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+视频发现缓存测试文件
+
+这个文件包含了对投稿列表缓存和批量发现功能的测试用例。
+"""
+
+import sys
+import time
+import tempfile
+import unittest
+from pathlib import Path
+
+# 添加源代码目录到系统路径
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from bilibili_monitor import BilibiliMonitor
+from discovery_cache import DiscoveryCache
+
+
+def make_videos(*video_ids, play=0):
+    """构造投稿列表"""
+    return [
+        {'bvid': video_id, 'title': video_id, 'author': '测试UP主', 'created': 1000 + i, 'play': play}
+        for i, video_id in enumerate(video_ids)
+    ]
+
+
+class TestDiscoveryCache(unittest.TestCase):
+    """测试投稿列表缓存"""
+    
+    def test_unchanged_ignores_volatile_fields(self):
+        """测试播放数变化不影响判断"""
+        cache = DiscoveryCache()
+        self.assertFalse(cache.update('1', make_videos('BV1', 'BV2', play=1)))
+        self.assertTrue(cache.update('1', make_videos('BV1', 'BV2', play=99)))
+        self.assertFalse(cache.update('1', make_videos('BV3', 'BV1', 'BV2')))
+        
+        stats = cache.get_stats()
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['unchanged'], 1)
+    
+    def test_ttl(self):
+        """测试有效期内跳过请求"""
+        cache = DiscoveryCache(ttl=60)
+        self.assertFalse(cache.is_fresh('1'))
+        cache.update('1', make_videos('BV1'))
+        self.assertTrue(cache.is_fresh('1'))
+        self.assertEqual(cache.get_stats()['ttl_hits'], 1)
+    
+    def test_covered_by_feed(self):
+        """测试批量接口没有新投稿时跳过单独请求"""
+        cache = DiscoveryCache()
+        self.assertFalse(cache.covered_by_feed('1', [], 3600))
+        
+        cache.update('1', make_videos('BV1', 'BV2'))
+        self.assertFalse(cache.covered_by_feed('1', [], 3600))
+        self.assertFalse(cache.covered_by_feed('1', [], 3600, feed_since=0))
+        self.assertTrue(cache.covered_by_feed('1', [{'bvid': 'BV2', 'created': 1001}], 3600))
+        self.assertTrue(cache.covered_by_feed('1', [], 3600, feed_since=0))
+        self.assertFalse(cache.covered_by_feed('1', [], 3600, feed_since=time.time() + 60))
+        self.assertFalse(cache.covered_by_feed('1', [{'bvid': 'BV3', 'created': 2000}], 3600))
+        self.assertEqual(cache.get_stats()['feed_covered'], 2)
+    
+    def test_save_skips_incomplete_entries(self):
+        """测试未下载完成的条目不持久化"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_file = str(Path(temp_dir) / 'cache.json')
+            cache = DiscoveryCache(cache_file=cache_file)
+            cache.update('1', make_videos('BV1'))
+            cache.update('2', make_videos('BV2'))
+            cache.save(is_complete=lambda bvids: 'BV2' not in bvids)
+            
+            reloaded = DiscoveryCache(cache_file=cache_file)
+            self.assertTrue(reloaded.update('1', make_videos('BV1')))
+            self.assertFalse(reloaded.update('2', make_videos('BV2')))
+
+
+class TestMonitorDiscovery(unittest.TestCase):
+    """测试监控流程中的缓存和批量发现"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.temp_dir.name)
+        self.monitor = BilibiliMonitor({
+            'bilibili': {
+                'up_list': ['1', '2'],
+                'download_dir': str(root / 'downloads'),
+                'discovery': {'feed': {'enabled': True, 'fallback_hours': 6}}
+            },
+            'paths': {'data_dir': str(root / 'data'), 'temp_dir': str(root / 'tmp')}
+        })
+        self.requested = []
+        self.monitor.get_up_videos_page = self._get_page
+        self.monitor.process_download_queue = lambda **kwargs: None
+    
+    def tearDown(self):
+        """测试后清理"""
+        self.temp_dir.cleanup()
+    
+    def _get_page(self, up_mid, page=1, page_size=10):
+        self.requested.append(up_mid)
+        return {'list': {'vlist': make_videos(f'BV{up_mid}a', f'BV{up_mid}b')}}
+    
+    def test_unchanged_response_skips_diff(self):
+        """测试投稿列表没有变化时不重复加入队列"""
+        self.assertEqual(self.monitor.check_up('1'), 2)
+        self.monitor.download_queue.clear()
+        self.assertEqual(self.monitor.check_up('1'), 0)
+        self.assertEqual(len(self.monitor.download_queue), 0)
+    
+    def test_feed_covers_many_mids(self):
+        """测试一次批量请求覆盖多个UP主"""
+        self.monitor.get_feed_videos = lambda: {}
+        self.monitor.check_and_download_new_videos()
+        self.assertEqual(self.requested, ['1', '2'])
+        
+        self.requested.clear()
+        self.monitor.get_feed_videos = lambda: {
+            '1': [{'bvid': 'BV1b', 'created': 1001}],
+            '2': [{'bvid': 'BV2new', 'created': 5000}]
+        }
+        self.monitor.check_and_download_new_videos()
+        self.assertEqual(self.requested, ['2'])
+        
+        # UP主1不在这一页中，但这一页覆盖了上次完整获取之后的全部投稿
+        self.requested.clear()
+        self.monitor.get_feed_videos = lambda: {'2': [{'bvid': 'BV2b', 'created': 1001}]}
+        self.monitor.check_and_download_new_videos()
+        self.assertEqual(self.requested, [])
+        self.assertEqual(self.monitor.get_status()['discovery']['feed_covered'], 3)
+    
+    def test_absent_from_feed_is_not_covered(self):
+        """测试没有出现在批量接口中的UP主不被跳过"""
+        self.monitor.get_feed_videos = lambda: {}
+        self.monitor.check_and_download_new_videos()
+        
+        # 未关注的UP主从不出现在动态中；这一页只覆盖最近的投稿时也不能说明没有新投稿
+        self.requested.clear()
+        self.monitor.get_feed_videos = lambda: {'2': [{'bvid': 'BV2b', 'created': 1001}]}
+        self.monitor.check_and_download_new_videos()
+        self.assertEqual(self.requested, ['1'])
+        
+        self.requested.clear()
+        self.monitor.get_feed_videos = lambda: {'2': [{'bvid': 'BV2b', 'created': int(time.time()) + 60}]}
+        self.monitor.check_and_download_new_videos()
+        self.assertEqual(self.requested, ['1', '2'])
+
+if __name__ == '__main__':
+    unittest.main()
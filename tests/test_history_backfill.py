@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+历史视频回填测试文件
+
+这个文件包含了对历史视频回填功能的测试用例。
+"""
+
+import sys
+import time
+import datetime
+import tempfile
+import unittest
+from pathlib import Path
+
+import schedule
+
+# 添加源代码目录到系统路径
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from bilibili_monitor import BilibiliMonitor
+from history_backfill import HistoryBackfill
+
+
+class FakeArchive:
+    """模拟分页的投稿列表接口"""
+    
+    def __init__(self, total, fail_pages=()):
+        now = int(time.time())
+        # 按发布时间倒序，每个视频间隔一天
+        self.videos = [
+            {'bvid': f'BV{i}', 'title': f'视频{i}', 'author': '测试UP主', 'created': now - i * 86400 - 3600}
+            for i in range(total)
+        ]
+        self.fail_pages = set(fail_pages)
+        self.requested = []
+    
+    def get_page(self, up_mid, page=1, page_size=10):
+        self.requested.append(page)
+        if page in self.fail_pages:
+            return None
+        start = (page - 1) * page_size
+        return {
+            'list': {'vlist': self.videos[start:start + page_size]},
+            'page': {'count': len(self.videos), 'pn': page, 'ps': page_size}
+        }
+
+
+class TestHistoryBackfill(unittest.TestCase):
+    """测试历史视频回填功能"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.monitor = BilibiliMonitor({
+            'bilibili': {'up_list': ['1'], 'download_dir': str(Path(self.temp_dir.name) / 'downloads')},
+            'paths': {'data_dir': str(Path(self.temp_dir.name) / 'data')}
+        })
+        self.config = {'page_size': 5, 'workers': 2}
+    
+    def tearDown(self):
+        """测试后清理"""
+        self.temp_dir.cleanup()
+    
+    def test_backfill_max_videos(self):
+        """测试按视频数量回填"""
+        archive = FakeArchive(23)
+        self.monitor.get_up_videos_page = archive.get_page
+        
+        count = HistoryBackfill(self.monitor, self.config).run('1', days=0, max_videos=12)
+        self.assertEqual(count, 12)
+        self.assertEqual(len(self.monitor.backfill_queue), 12)
+        self.assertEqual(len(self.monitor.download_queue), 0)
+    
+    def test_backfill_days(self):
+        """测试按天数回填"""
+        archive = FakeArchive(23)
+        self.monitor.get_up_videos_page = archive.get_page
+        
+        count = HistoryBackfill(self.monitor, self.config).run('1', days=7, max_videos=0)
+        self.assertEqual(count, 7)
+        self.assertNotIn(5, archive.requested)
+    
+    def test_resume_from_checkpoint(self):
+        """测试中断后从检查点继续"""
+        archive = FakeArchive(23, fail_pages=[3])
+        self.monitor.get_up_videos_page = archive.get_page
+        HistoryBackfill(self.monitor, self.config).run('1', days=0, max_videos=0)
+        self.assertEqual(len(self.monitor.backfill_queue), 10)
+        
+        archive.fail_pages.clear()
+        archive.requested.clear()
+        HistoryBackfill(self.monitor, self.config).run('1', days=0, max_videos=0)
+        self.assertNotIn(1, archive.requested)
+        self.assertEqual(len(self.monitor.backfill_queue), 23)
+    
+    def test_live_queue_has_priority(self):
+        """测试实时检查发现的视频优先下载"""
+        self.monitor.enqueue_backfill('1', [{'bvid': 'BVold', 'title': '旧视频', 'author': '测试UP主'}])
+        self.monitor.download_queue.append({'bvid': 'BVnew', 'title': '新视频', 'author': '测试UP主'})
+        self.assertEqual(self.monitor._next_queued_video()['bvid'], 'BVnew')
+        self.assertEqual(self.monitor._next_queued_video()['bvid'], 'BVold')
+    
+    def _queue_backfill_downloads(self, on_first_download):
+        """加入回填视频并模拟下载，第一个视频下载时调用 on_first_download"""
+        self.monitor.enqueue_backfill('1', [
+            {'bvid': f'BVold{i}', 'title': f'旧视频{i}', 'author': '测试UP主'} for i in range(5)
+        ])
+        downloaded = []
+        
+        def download_video(video):
+            downloaded.append(video['bvid'])
+            if len(downloaded) == 1:
+                on_first_download()
+            return True
+        
+        self.monitor.download_video = download_video
+        return downloaded
+    
+    def test_poll_command_runs_during_backfill(self):
+        """测试回填队列未下载完时控制命令不被阻塞"""
+        polled = []
+        self.monitor.check_up = lambda up_mid, force=False: polled.append(len(self.monitor.backfill_queue)) or 0
+        downloaded = self._queue_backfill_downloads(lambda: self.monitor.request_poll('1'))
+        
+        self.monitor._run_scheduler_step(schedule.Scheduler())
+        self.assertEqual(downloaded, ['BVold0'])
+        self.assertEqual(polled, [4])
+    
+    def test_scheduled_job_runs_during_backfill(self):
+        """测试回填队列未下载完时到期的定时任务不被阻塞"""
+        scheduler = schedule.Scheduler()
+        job_runs = []
+        job = scheduler.every(1).hours.do(lambda: job_runs.append(len(self.monitor.backfill_queue)))
+        
+        def make_job_due():
+            job.next_run = datetime.datetime.now() - datetime.timedelta(seconds=1)
+        
+        downloaded = self._queue_backfill_downloads(make_job_due)
+        
+        self.monitor._run_scheduler_step(scheduler)
+        self.assertEqual(downloaded, ['BVold0'])
+        self.assertEqual(job_runs, [])
+        
+        self.monitor._run_scheduler_step(scheduler)
+        self.assertEqual(job_runs, [4])
+        self.assertEqual(len(downloaded), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+日志配置测试文件
+
+这个文件包含了对统一日志配置的测试用例。
+"""
+
+import json
+import sys
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+
+# 添加源代码目录到系统路径
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from logging_setup import setup_logging, shutdown_logging
+
+
+class TestLoggingSetup(unittest.TestCase):
+    """测试日志配置功能"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.log_file = Path(self.temp_dir.name) / 'test.log'
+        self.json_file = Path(self.temp_dir.name) / 'test.jsonl'
+        shutdown_logging()
+    
+    def tearDown(self):
+        """测试后清理"""
+        shutdown_logging()
+        logging.getLogger('test_module').setLevel(logging.NOTSET)
+        self.temp_dir.cleanup()
+    
+    def _setup(self, log_level='info'):
+        """按测试配置初始化日志"""
+        return setup_logging({
+            'settings': {'log_level': log_level},
+            'logging': {'file': str(self.log_file), 'json_file': str(self.json_file)}
+        })
+    
+    def test_json_lines_fields(self):
+        """测试JSON Lines输出包含结构化字段"""
+        self._setup()
+        logging.getLogger('test_module').info(
+            "下载完成", extra={'mid': '123', 'bvid': 'BV1xx', 'stage': 'download', 'duration_ms': 42}
+        )
+        shutdown_logging()
+        
+        entry = json.loads(self.json_file.read_text(encoding='utf-8').splitlines()[-1])
+        self.assertEqual(entry['message'], '下载完成')
+        self.assertEqual(entry['mid'], '123')
+        self.assertEqual(entry['bvid'], 'BV1xx')
+        self.assertEqual(entry['stage'], 'download')
+        self.assertEqual(entry['duration_ms'], 42)
+        self.assertIn('下载完成', self.log_file.read_text(encoding='utf-8'))
+    
+    def test_json_exception_field(self):
+        """测试异常堆栈写入单独的JSON字段"""
+        self._setup()
+        try:
+            raise ValueError("测试异常")
+        except ValueError:
+            logging.getLogger('test_module').exception("下载失败")
+        shutdown_logging()
+        
+        entry = json.loads(self.json_file.read_text(encoding='utf-8').splitlines()[-1])
+        self.assertEqual(entry['message'], '下载失败')
+        self.assertIn('ValueError: 测试异常', entry['exc_info'])
+        self.assertIn('ValueError: 测试异常', self.log_file.read_text(encoding='utf-8'))
+    
+    def test_per_module_level(self):
+        """测试按模块设置日志级别"""
+        self._setup({'default': 'warning', 'test_module': 'debug'})
+        logging.getLogger('test_module').debug("模块调试日志")
+        logging.getLogger('other_module').info("其他模块日志")
+        shutdown_logging()
+        
+        content = self.log_file.read_text(encoding='utf-8')
+        self.assertIn('模块调试日志', content)
+        self.assertNotIn('其他模块日志', content)
+    
+    def test_setup_is_idempotent(self):
+        """测试重复初始化返回同一个后台线程"""
+        self.assertIs(self._setup(), self._setup())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,7 @@
 """
 
 import unittest
+import argparse
 import sys
 import os
 from pathlib import Path
@@ -15,7 +16,7 @@ from pathlib import Path
 # 添加项目根目录到系统路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.main import load_config
+from src.main import load_config, up_mid_argument
 
 
 class TestMain(unittest.TestCase):
@@ -32,6 +33,13 @@ class TestMain(unittest.TestCase):
         self.assertIsInstance(config, dict)
         self.assertIn('app_name', config)
         self.assertEqual(config['app_name'], '我的新项目')
+    
+    def test_up_mid_argument(self):
+        """测试命令行UP主ID校验"""
+        self.assertEqual(up_mid_argument('12345678'), '12345678')
+        for value in ('../etc', 'abc', '１２３'):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                up_mid_argument(value)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+启动耗时测试文件
+
+这个文件用 -X importtime 检查主程序和命令启动时导入的模块及导入耗时。cron中频繁运行的命令应只导入所需的模块。
+"""
+
+import sys
+import json
+import tempfile
+import unittest
+import subprocess
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+SRC_DIR = PROJECT_ROOT / 'src'
+
+# 只处理本地数据的命令不应导入的模块
+HEAVY_MODULES = ('requests', 'schedule', 'concurrent.futures', 'bilibili_downloader', 'bandwidth_governor')
+
+
+def run_with_importtime(args, cwd):
+    """以 -X importtime 运行Python
+    
+    Returns:
+        (导入的模块集合, 顶层导入的累计耗时（微秒）, 返回码)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + args,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    
+    modules = set()
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        modules.add(name.strip())
+        # 被其他模块导入的模块名前有额外缩进，其耗时已计入上层模块的累计耗时
+        if cumulative.strip().isdigit() and len(name) - len(name.lstrip()) == 1:
+            total_us += int(cumulative)
+    return modules, total_us, result.returncode
+
+
+class TestStartup(unittest.TestCase):
+    """测试启动时导入的模块"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.temp_dir.name)
+        self.config_path = root / 'config.json'
+        self.config_path.write_text(json.dumps({
+            'bilibili': {'up_list': ['1'], 'download_dir': str(root / 'downloads')},
+            'paths': {'data_dir': str(root / 'data'), 'temp_dir': str(root / 'tmp')},
+            'logging': {'file': str(root / 'test.log')}
+        }), encoding='utf-8')
+    
+    def tearDown(self):
+        """测试后清理"""
+        self.temp_dir.cleanup()
+    
+    def test_import_main(self):
+        """测试导入主程序时不加载监控依赖"""
+        modules, _, returncode = run_with_importtime(['-c', 'import main'], SRC_DIR)
+        self.assertEqual(returncode, 0)
+        self.assertIn('main', modules)
+        for module in HEAVY_MODULES + ('bilibili_monitor',):
+            self.assertNotIn(module, modules)
+    
+    def test_clean_startup(self):
+        """测试 --clean 只加载清理所需的模块"""
+        modules, _, returncode = run_with_importtime(
+            [str(SRC_DIR / 'main.py'), '--clean', '--config', str(self.config_path)],
+            self.temp_dir.name
+        )
+        self.assertEqual(returncode, 0)
+        self.assertIn('bilibili_monitor', modules)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, modules)
+        self.assertFalse((Path(self.temp_dir.name) / 'downloads').exists())
+    
+    def test_clean_import_time(self):
+        """测试 --clean 的导入耗时低于同一环境中导入全部监控依赖的耗时"""
+        _, clean_us, returncode = run_with_importtime(
+            [str(SRC_DIR / 'main.py'), '--clean', '--config', str(self.config_path)],
+            self.temp_dir.name
+        )
+        self.assertEqual(returncode, 0)
+        
+        # 以同一次运行中导入完整依赖的耗时为基准，不使用固定的时间上限
+        _, full_us, returncode = run_with_importtime(
+            ['-c', 'import main, bilibili_monitor, ' + ', '.join(HEAVY_MODULES)],
+            SRC_DIR
+        )
+        self.assertEqual(returncode, 0)
+        self.assertLess(clean_us, full_us, f"--clean 导入耗时 {clean_us} us，完整导入 {full_us} us")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+状态/控制接口测试文件
+
+这个文件包含了对本地状态接口的测试用例。
+"""
+
+import os
+import json
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.request
+from pathlib import Path
+from unittest import mock
+
+# 添加源代码目录到系统路径
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from bilibili_monitor import BilibiliMonitor
+from status_server import StatusServer
+
+
+class TestStatusServer(unittest.TestCase):
+    """测试状态/控制接口"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        config = {
+            'bilibili': {
+                'up_list': ['12345678'],
+                'save_days': 7,
+                'download_dir': self.temp_dir.name
+            }
+        }
+        self.monitor = BilibiliMonitor(config)
+        self.monitor.downloaded_videos['BV1xx'] = {
+            'title': '测试视频',
+            'up_name': '测试UP主',
+            'download_time': '2024-01-01 00:00:00',
+            'path': 'test.mp4'
+        }
+        self.server = StatusServer(self.monitor, port=0).start()
+        host, port = self.server.address[:2]
+        self.base_url = f"http://{host}:{port}"
+    
+    def tearDown(self):
+        """测试后清理"""
+        self.server.stop()
+        self.temp_dir.cleanup()
+    
+    def _request(self, path, method='GET'):
+        """发送请求并解析JSON响应"""
+        request = urllib.request.Request(self.base_url + path, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read().decode('utf-8'))
+    
+    def test_status_snapshot(self):
+        """测试状态快照"""
+        code, status = self._request('/status')
+        self.assertEqual(code, 200)
+        self.assertEqual(status['cycle']['status'], 'idle')
+        self.assertIn('12345678', status['ups'])
+        self.assertEqual(status['index']['total'], 1)
+        self.assertFalse(status['downloads']['paused'])
+    
+    def test_status_does_not_create_components(self):
+        """测试状态查询不创建带宽控制器和投稿列表缓存"""
+        code, status = self._request('/status')
+        self.assertEqual(code, 200)
+        self.assertIsNone(status['discovery'])
+        self.assertIsNone(status['downloads']['governor'])
+        self.assertNotIn('discovery_cache', self.monitor.__dict__)
+        self.assertNotIn('governor', self.monitor.__dict__)
+    
+    def test_pause_and_resume(self):
+        """测试暂停和恢复下载"""
+        code, _ = self._request('/downloads/pause', method='POST')
+        self.assertEqual(code, 200)
+        self.assertTrue(self.monitor.downloads_paused.is_set())
+        
+        code, _ = self._request('/downloads/resume', method='POST')
+        self.assertEqual(code, 200)
+        self.assertFalse(self.monitor.downloads_paused.is_set())
+    
+    def test_poll_command(self):
+        """测试立即检查命令"""
+        code, _ = self._request('/poll/12345678', method='POST')
+        self.assertEqual(code, 202)
+        self.assertEqual(self.monitor._commands.get_nowait(), ('poll', '12345678'))
+        
+        code, _ = self._request('/poll/999', method='POST')
+        self.assertEqual(code, 404)
+    
+    def test_backfill_command(self):
+        """测试回填命令只接受数字UP主ID"""
+        code, _ = self._request('/backfill/87654321', method='POST')
+        self.assertEqual(code, 202)
+        self.assertEqual(self.monitor._commands.get_nowait(), ('backfill', '87654321'))
+        
+        for up_mid in ('..', 'abc', '12a'):
+            code, _ = self._request(f'/backfill/{up_mid}', method='POST')
+            self.assertEqual(code, 400)
+        self.assertTrue(self.monitor._commands.empty())
+    
+    def test_status_not_blocked_by_index_write(self):
+        """测试保存索引文件时状态查询不需要等待磁盘写入"""
+        writing = threading.Event()
+        release = threading.Event()
+        real_replace = os.replace
+        
+        def slow_replace(src, dst):
+            writing.set()
+            release.wait(5)
+            return real_replace(src, dst)
+        
+        with mock.patch('bilibili_monitor.os.replace', side_effect=slow_replace):
+            saver = threading.Thread(target=self.monitor._save_downloaded_videos)
+            saver.start()
+            try:
+                self.assertTrue(writing.wait(5))
+                reader = threading.Thread(target=self.monitor.get_status)
+                reader.start()
+                reader.join(1)
+                self.assertFalse(reader.is_alive())
+            finally:
+                release.set()
+                saver.join()
+    
+    def test_port_in_use(self):
+        """测试端口被占用时不启动状态接口，监控继续运行"""
+        host, port = self.server.address[:2]
+        self.monitor.config['status_api'] = {'enabled': True, 'host': host, 'port': port}
+        self.assertIsNone(self.monitor.start_status_server())
+    
+    def test_unknown_path(self):
+        """测试未知路径"""
+        code, _ = self._request('/unknown')
+        self.assertEqual(code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
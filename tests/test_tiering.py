@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+冷热分层测试文件
+
+这个文件包含了对冷热分层存储功能的测试用例。
+"""
+
+import os
+import sys
+import json
+import errno
+import datetime
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# 添加源代码目录到系统路径
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from bilibili_monitor import BilibiliMonitor
+
+
+class TestTiering(unittest.TestCase):
+    """测试冷热分层功能"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.temp_dir.name)
+        self.download_dir = root / 'downloads'
+        self.cold_dir = root / 'cold'
+        self.monitor = BilibiliMonitor({
+            'bilibili': {
+                'up_list': ['1'],
+                'save_days': 7,
+                'download_dir': str(self.download_dir),
+                'tiering': {'cold_dir': str(self.cold_dir), 'after_days': 2, 'batch_size': 2}
+            },
+            'paths': {'temp_dir': str(root / 'tmp')}
+        })
+    
+    def tearDown(self):
+        """测试后清理"""
+        self.temp_dir.cleanup()
+    
+    def _add_video(self, video_id, days_ago):
+        """添加一个已下载视频"""
+        path = self.download_dir / '测试UP主' / f'{video_id}.mp4'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'video')
+        download_time = datetime.datetime.now() - datetime.timedelta(days=days_ago)
+        self.monitor.downloaded_videos[video_id] = {
+            'title': video_id,
+            'up_name': '测试UP主',
+            'download_time': download_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'path': str(path)
+        }
+        return path
+    
+    def test_tier_moves_old_videos(self):
+        """测试旧视频移动到冷存储并更新索引"""
+        old_paths = [self._add_video(f'BVold{i}', 3) for i in range(3)]
+        new_path = self._add_video('BVnew', 0)
+        
+        self.assertEqual(self.monitor.tier_videos(), 3)
+        for i, path in enumerate(old_paths):
+            cold_path = self.cold_dir / '测试UP主' / path.name
+            self.assertFalse(path.exists())
+            self.assertTrue(cold_path.exists())
+            self.assertEqual(self.monitor.downloaded_videos[f'BVold{i}']['path'], str(cold_path))
+        self.assertTrue(new_path.exists())
+        
+        saved = json.loads(self.monitor.video_info_file.read_text(encoding='utf-8'))
+        self.assertEqual(saved['BVold0']['tier'], 'cold')
+        self.assertEqual(self.monitor.tier_stats['cold']['files'], 3)
+    
+    def test_expired_videos_deleted_from_cold_tier(self):
+        """测试过期视频从冷存储中删除"""
+        path = self._add_video('BVexpired', 10)
+        self.monitor.tier_videos()
+        cold_path = self.cold_dir / '测试UP主' / path.name
+        self.assertTrue(cold_path.exists())
+        
+        self.monitor.clean_expired_videos()
+        self.assertFalse(cold_path.exists())
+        self.assertNotIn('BVexpired', self.monitor.downloaded_videos)
+    
+    def test_recover_moved_but_not_indexed(self):
+        """测试已移动但索引未更新的视频"""
+        path = self._add_video('BVmoved', 3)
+        cold_path = self.cold_dir / '测试UP主' / path.name
+        cold_path.parent.mkdir(parents=True)
+        path.rename(cold_path)
+        
+        self.assertEqual(self.monitor.tier_videos(), 1)
+        self.assertEqual(self.monitor.downloaded_videos['BVmoved']['path'], str(cold_path))
+    
+    def test_tier_across_filesystems(self):
+        """测试跨文件系统时复制后重命名，不留下临时文件"""
+        path = self._add_video('BVcross', 3)
+        real_replace = os.replace
+        
+        def replace(src, dst):
+            # 只模拟视频文件移动到冷存储时跨文件系统，索引文件照常保存
+            if Path(dst).is_relative_to(self.cold_dir) and not Path(src).name.startswith('.'):
+                raise OSError(errno.EXDEV, 'Invalid cross-device link')
+            return real_replace(src, dst)
+        
+        with mock.patch('file_manager.os.replace', side_effect=replace):
+            self.assertEqual(self.monitor.tier_videos(), 1)
+        
+        cold_path = self.cold_dir / '测试UP主' / path.name
+        self.assertFalse(path.exists())
+        self.assertEqual(cold_path.read_bytes(), b'video')
+        self.assertEqual(os.listdir(cold_path.parent), [path.name])
+        self.assertEqual(self.monitor._load_downloaded_videos()['BVcross']['tier'], 'cold')
+
+
+if __name__ == '__main__':
+    unittest.main()